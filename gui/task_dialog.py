@@ -171,6 +171,7 @@ class TaskDialog(QDialog):
         # Destination
         dst_layout = QHBoxLayout()
         self.file_dest_edit = QLineEdit()
+        self.file_dest_edit.setPlaceholderText("Separate several destinations with ';'")
         dst_browse_btn = QPushButton("Browse...")
         dst_browse_btn.clicked.connect(self.browse_file_dest)
         dst_layout.addWidget(self.file_dest_edit)
@@ -179,7 +180,7 @@ class TaskDialog(QDialog):
         
         # Operation
         self.operation_combo = QComboBox()
-        self.operation_combo.addItems(["Copy", "Move"])
+        self.operation_combo.addItems(["Copy", "Move", "Sync", "Archive"])
         form.addRow("Operation:", self.operation_combo)
         
         # Options
@@ -194,6 +195,33 @@ class TaskDialog(QDialog):
         self.mirror_check = QCheckBox("Mirror mode (delete extras in destination)")
         form.addRow("", self.mirror_check)
         
+        self.only_changed_check = QCheckBox("Only copy changed files (incremental)")
+        form.addRow("", self.only_changed_check)
+        
+        self.watch_check = QCheckBox("Watch for changes (continuous sync)")
+        form.addRow("", self.watch_check)
+        
+        self.snapshot_check = QCheckBox("Versioned snapshots (hardlink unchanged files)")
+        form.addRow("", self.snapshot_check)
+        
+        self.verify_check = QCheckBox("Verify copies by checksum")
+        form.addRow("", self.verify_check)
+        
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 32)
+        self.workers_spin.setValue(1)
+        form.addRow("Parallel Copies:", self.workers_spin)
+        
+        self.scan_workers_spin = QSpinBox()
+        self.scan_workers_spin.setRange(1, 64)
+        self.scan_workers_spin.setValue(1)
+        form.addRow("Parallel Directory Scans:", self.scan_workers_spin)
+        
+        # Durability (fsync policy)
+        self.fsync_combo = QComboBox()
+        self.fsync_combo.addItems(["Never", "Directory", "File"])
+        form.addRow("Flush to Disk:", self.fsync_combo)
+        
         # File patterns
         self.file_patterns_edit = QLineEdit()
         self.file_patterns_edit.setPlaceholderText("e.g., *.txt, *.pdf, *.docx")
@@ -425,9 +453,19 @@ class TaskDialog(QDialog):
             
         elif self.task.task_type == "file_transfer":
             self.file_source_edit.setText(config.get("source", ""))
-            self.file_dest_edit.setText(config.get("destination", ""))
+            destination = config.get("destination", "")
+            if isinstance(destination, list):
+                destination = "; ".join(destination)
+            self.file_dest_edit.setText(destination)
             self.overwrite_check.setChecked(config.get("overwrite", True))
             self.mirror_check.setChecked(config.get("mirror", False))
+            self.only_changed_check.setChecked(config.get("only_changed", False))
+            self.watch_check.setChecked(config.get("watch", False))
+            self.snapshot_check.setChecked(config.get("snapshot", False))
+            self.verify_check.setChecked(config.get("verify", False))
+            self.workers_spin.setValue(config.get("workers", 1))
+            self.scan_workers_spin.setValue(config.get("scan_workers", 1))
+            self.fsync_combo.setCurrentText(config.get("fsync", "never").capitalize())
             
         elif self.task.task_type == "git":
             self.git_repo_edit.setText(config.get("repo_path", ""))
@@ -466,14 +504,22 @@ class TaskDialog(QDialog):
         elif task_type_index == 1:  # File Transfer
             patterns = [p.strip() for p in self.file_patterns_edit.text().split(",") if p.strip()]
             exclude = [p.strip() for p in self.exclude_patterns_edit.text().split(",") if p.strip()]
+            destinations = [d.strip() for d in self.file_dest_edit.text().split(";") if d.strip()]
             
             config = {
                 "source": self.file_source_edit.text(),
-                "destination": self.file_dest_edit.text(),
+                "destination": destinations if len(destinations) > 1 else self.file_dest_edit.text(),
                 "operation": self.operation_combo.currentText().lower(),
                 "overwrite": self.overwrite_check.isChecked(),
                 "recursive": self.recursive_check.isChecked(),
                 "mirror": self.mirror_check.isChecked(),
+                "only_changed": self.only_changed_check.isChecked(),
+                "watch": self.watch_check.isChecked(),
+                "snapshot": self.snapshot_check.isChecked(),
+                "verify": self.verify_check.isChecked(),
+                "workers": self.workers_spin.value(),
+                "scan_workers": self.scan_workers_spin.value(),
+                "fsync": self.fsync_combo.currentText().lower(),
                 "file_patterns": patterns,
                 "exclude_patterns": exclude
             }
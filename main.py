@@ -3,23 +3,25 @@ Automation Hub - Main Application
 Professional task automation and scheduling system
 """
 
+import multiprocessing
 import sys
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
-
-# Import utilities
-from utils import init_logger, init_config_manager, init_scheduler, get_logger
-from gui.main_window import MainWindow
-
 
 def main():
     """Main application entry point"""
     
+    # Imported here: worker processes (checksum verification) re-import
+    # this module and must not load Qt and the GUI
+    from PyQt6.QtWidgets import QApplication
+    
+    # Import utilities
+    from utils import init_logger, init_config_manager, init_scheduler
+    from gui.main_window import MainWindow
+    
     # Initialize application
     app = QApplication(sys.argv)
     app.setApplicationName("Automation Hub")
@@ -67,4 +69,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Lets worker processes start in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,9 @@
+"""
+Test configuration
+Makes the project packages importable from the tests directory
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,129 @@
+"""
+CompactManifest Tests
+Binary manifest round-trips and import of JSON manifests
+"""
+
+from utils.compact_manifest import CompactManifest, FileList
+from utils.file_scanner import ScanEntry
+from utils.sync_manifest import SyncManifest
+
+
+ENTRIES = {
+    "a.txt": ((1, 1_000_000_000, 11), (1, 1_000_000_000, 21)),
+    "dir/b.bin": ((2048, 2_000_000_123, 12), (2048, 2_000_000_123, 22)),
+    "dir/sub/c.dat": ((0, 3_000_000_000, 13), (0, 3_000_000_000, 23)),
+    "ünïcode/ß.txt": ((7, 4_000_000_000, 14), (7, 4_000_000_000, 24)),
+}
+
+
+def _filled(path) -> CompactManifest:
+    manifest = CompactManifest(path, "/src", "/dst")
+    for rel_path, (src_sig, dst_sig) in ENTRIES.items():
+        manifest.update(rel_path, src_sig, dst_sig)
+    return manifest
+
+
+def test_save_load_round_trip(tmp_path):
+    manifest_file = tmp_path / "m.bin"
+    assert _filled(manifest_file).save()
+
+    loaded = CompactManifest(manifest_file)
+    assert loaded.load()
+    assert len(loaded.entries) == len(ENTRIES)
+    for rel_path, signatures in ENTRIES.items():
+        assert loaded.get(rel_path) == signatures
+        assert loaded.is_unchanged(rel_path, signatures[0])
+    assert loaded.get("missing.txt") is None
+    assert not loaded.is_unchanged("a.txt", (1, 1_000_000_001, 11))
+    loaded.close()
+
+
+def test_changes_after_load_are_merged_on_save(tmp_path):
+    manifest_file = tmp_path / "m.bin"
+    assert _filled(manifest_file).save()
+
+    manifest = CompactManifest(manifest_file)
+    manifest.load()
+    manifest.update("new.txt", (5, 5, 5), (5, 5, 6))
+    manifest.update("a.txt", (9, 9, 9), (9, 9, 9))
+    manifest.remove("dir/b.bin")
+    assert manifest.save()
+    manifest.close()
+
+    loaded = CompactManifest(manifest_file)
+    loaded.load()
+    assert loaded.get("new.txt") == ((5, 5, 5), (5, 5, 6))
+    assert loaded.get("a.txt") == ((9, 9, 9), (9, 9, 9))
+    assert loaded.get("dir/b.bin") is None
+    assert sorted(loaded.entries) == sorted(["a.txt", "dir/sub/c.dat", "ünïcode/ß.txt", "new.txt"])
+    loaded.close()
+
+
+def test_retain_drops_other_paths(tmp_path):
+    manifest_file = tmp_path / "m.bin"
+    assert _filled(manifest_file).save()
+
+    manifest = CompactManifest(manifest_file)
+    manifest.load()
+    manifest.retain(["a.txt"])
+    assert manifest.save()
+    manifest.close()
+
+    loaded = CompactManifest(manifest_file)
+    loaded.load()
+    assert list(loaded.entries) == ["a.txt"]
+    loaded.close()
+
+
+def test_digests_survive_round_trip(tmp_path):
+    manifest_file = tmp_path / "m.bin"
+    manifest = _filled(manifest_file)
+    manifest.set_digest("a.txt", "ab" * 32, "sha256")
+    assert manifest.save()
+
+    loaded = CompactManifest(manifest_file)
+    loaded.load()
+    assert loaded.digest_algorithm == "sha256"
+    assert loaded.digest("a.txt").hex().startswith("abab")
+    assert loaded.digest("dir/b.bin") is None
+    loaded.close()
+
+
+def test_imports_json_manifest(tmp_path):
+    legacy = SyncManifest(tmp_path / "pair.json", "/src", "/dst")
+    for rel_path, (src_sig, dst_sig) in ENTRIES.items():
+        legacy.update(rel_path, src_sig, dst_sig)
+    assert legacy.save()
+
+    manifest = CompactManifest(tmp_path / "pair.bin")
+    assert manifest.load()
+    for rel_path, signatures in ENTRIES.items():
+        assert manifest.get(rel_path) == signatures
+
+    # Written in the binary format on the next save
+    assert manifest.save()
+    manifest.close()
+    assert (tmp_path / "pair.bin").exists()
+    reloaded = CompactManifest(tmp_path / "pair.bin")
+    assert reloaded.load()
+    assert reloaded.get("dir/sub/c.dat") == ENTRIES["dir/sub/c.dat"]
+    reloaded.close()
+
+
+def test_missing_manifest_loads_empty(tmp_path):
+    manifest = CompactManifest(tmp_path / "none.bin")
+    assert not manifest.load()
+    assert len(manifest.entries) == 0
+
+
+def test_file_list_keeps_entries(tmp_path):
+    files = FileList(str(tmp_path))
+    files.extend([
+        ScanEntry(str(tmp_path / "a.txt"), "a.txt", 1, 10, 100),
+        ScanEntry(str(tmp_path / "d" / "b.txt"), "d/b.txt", 2, 20, 200),
+    ])
+    assert len(files) == 2
+    assert list(files.rel_paths()) == ["a.txt", "d/b.txt"]
+    entry = list(files)[1]
+    assert (entry.rel_path, entry.size, entry.mtime_ns, entry.ino) == ("d/b.txt", 2, 20, 200)
+    assert files.total_size == 3
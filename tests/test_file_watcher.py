@@ -0,0 +1,53 @@
+"""
+FileWatcher Tests
+Event filtering and batching of watched changes
+"""
+
+from types import SimpleNamespace
+
+from utils.file_watcher import FileWatcher, _ChangeHandler
+
+
+def _event(event_type, path, is_directory=False, dest_path=None):
+    return SimpleNamespace(event_type=event_type, src_path=str(path),
+                           is_directory=is_directory, dest_path=dest_path and str(dest_path))
+
+
+def _collect(watcher):
+    return watcher.collect(debounce=0, timeout=0)
+
+
+def test_file_events_are_collected(tmp_path):
+    watcher = FileWatcher(tmp_path)
+    handler = _ChangeHandler(watcher)
+    handler.on_any_event(_event("created", tmp_path / "dir" / "new.txt"))
+    handler.on_any_event(_event("modified", tmp_path / "dir" / "new.txt"))
+    handler.on_any_event(_event("moved", tmp_path / "old.txt", dest_path=tmp_path / "renamed.txt"))
+    assert _collect(watcher) == ({"dir/new.txt", "old.txt", "renamed.txt"}, False)
+
+
+def test_directory_modified_events_are_dropped(tmp_path):
+    watcher = FileWatcher(tmp_path)
+    handler = _ChangeHandler(watcher)
+    handler.on_any_event(_event("modified", tmp_path / "dir", is_directory=True))
+    handler.on_any_event(_event("opened", tmp_path / "dir" / "a.txt"))
+    handler.on_any_event(_event("closed_no_write", tmp_path / "dir" / "a.txt"))
+    assert _collect(watcher) == (set(), False)
+
+
+def test_created_and_moved_directories_are_collected(tmp_path):
+    watcher = FileWatcher(tmp_path)
+    handler = _ChangeHandler(watcher)
+    handler.on_any_event(_event("created", tmp_path / "new_dir", is_directory=True))
+    handler.on_any_event(_event("moved", tmp_path.parent / "outside", is_directory=True,
+                                dest_path=tmp_path / "moved_in"))
+    assert _collect(watcher) == ({"new_dir", "moved_in"}, False)
+
+
+def test_overflow_replaces_pending_paths(tmp_path):
+    watcher = FileWatcher(tmp_path, max_pending=3)
+    handler = _ChangeHandler(watcher)
+    for i in range(5):
+        handler.on_any_event(_event("modified", tmp_path / f"f{i}.txt"))
+    assert _collect(watcher) == (set(), True)
+    assert _collect(watcher) == (set(), False)
@@ -0,0 +1,91 @@
+"""
+Timestamp Rules Tests
+mtime tolerance, DST shifts and inode handling per filesystem
+"""
+
+import pytest
+
+from utils import fs_timestamps
+from utils.fs_timestamps import EXACT_RULES, TimestampRules
+
+
+SECOND = 1_000_000_000
+HOUR = 3600 * SECOND
+BASE = 1_700_000_000 * SECOND
+
+
+def _rules(monkeypatch, fs_type, tolerance_ms=None):
+    monkeypatch.setattr(fs_timestamps, "filesystem_type", lambda path: fs_type)
+    return TimestampRules.for_path("/mnt/media", tolerance_ms)
+
+
+@pytest.mark.parametrize("fs_type", ["vfat", "exfat"])
+@pytest.mark.parametrize("diff, expected", [
+    (0, True),
+    (1 * SECOND, True),
+    (2 * SECOND, True),
+    (2 * SECOND + 1, False),
+    (3 * SECOND, False),
+    (HOUR, True),
+    (HOUR - 2 * SECOND, True),
+    (HOUR + 2 * SECOND, True),
+    (HOUR + 3 * SECOND, False),
+    (HOUR - 3 * SECOND, False),
+    (2 * HOUR, False),
+])
+def test_fat_mtime_tolerance(monkeypatch, fs_type, diff, expected):
+    rules = _rules(monkeypatch, fs_type)
+    assert not rules.exact
+    assert rules.mtime_matches(BASE, BASE + diff) is expected
+    assert rules.mtime_matches(BASE + diff, BASE) is expected
+    assert rules.same_file(10, BASE, 10, BASE + diff) is expected
+
+
+@pytest.mark.parametrize("diff, expected", [
+    (0, True),
+    (1, False),
+    (2 * SECOND, False),
+    (3 * SECOND, False),
+    (HOUR, False),
+])
+def test_non_fat_filesystem_compares_exactly(monkeypatch, diff, expected):
+    rules = _rules(monkeypatch, "ext4")
+    assert rules.exact
+    assert rules.same_file(10, BASE, 10, BASE + diff) is expected
+    assert rules.signature_matches((10, BASE, 7), (10, BASE + diff, 7)) is expected
+
+
+def test_size_must_match(monkeypatch):
+    rules = _rules(monkeypatch, "vfat")
+    assert not rules.same_file(10, BASE, 11, BASE)
+
+
+def test_ntfs_tolerates_only_its_resolution(monkeypatch):
+    rules = _rules(monkeypatch, "ntfs")
+    assert rules.same_file(1, BASE, 1, BASE + 100)
+    assert not rules.same_file(1, BASE, 1, BASE + 101)
+    assert not rules.same_file(1, BASE, 1, BASE + HOUR)
+
+
+def test_explicit_tolerance_overrides_detected(monkeypatch):
+    rules = _rules(monkeypatch, "vfat", tolerance_ms=3000)
+    assert rules.mtime_matches(BASE, BASE + 3 * SECOND)
+    assert not rules.mtime_matches(BASE, BASE + 4 * SECOND)
+    rules = _rules(monkeypatch, "ext4", tolerance_ms=500)
+    assert rules.mtime_matches(BASE, BASE + SECOND // 2)
+    assert not rules.mtime_matches(BASE, BASE + HOUR)
+
+
+def test_inode_ignored_only_on_fat(monkeypatch):
+    fat = _rules(monkeypatch, "vfat")
+    assert fat.signature_matches((10, BASE, 1), (10, BASE + SECOND, 2))
+    assert not EXACT_RULES.signature_matches((10, BASE, 1), (10, BASE, 2))
+
+
+def test_combine_takes_the_looser_rules(monkeypatch):
+    fat = _rules(monkeypatch, "vfat")
+    assert EXACT_RULES.combine(fat) is fat
+    assert fat.combine(EXACT_RULES) is fat
+    combined = TimestampRules(100).combine(fat)
+    assert combined.tolerance_ns == 2 * SECOND
+    assert combined.hour_shift and combined.ignore_inode
@@ -0,0 +1,67 @@
+"""
+Incremental Copy Tests
+Manifest-based skipping of unchanged files and restoring of destination copies
+"""
+
+import os
+
+import pytest
+
+from tasks.file_transfer_task import FileTransferTask
+from utils.transfer_plan import ACTION_COPY, ACTION_SKIP, ACTION_UPDATE
+
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "src"
+    (source / "d").mkdir(parents=True)
+    for name in ("a", "b", "c"):
+        (source / "d" / f"{name}.txt").write_text(name * 10)
+    return source, tmp_path / "dst"
+
+
+def _task(tmp_path, source, destination, **options):
+    config = {
+        "source": str(source), "destination": str(destination), "only_changed": True,
+        "manifest_dir": str(tmp_path / "manifests"), **options
+    }
+    task = FileTransferTask("copy", config)
+    task.on_log_message = lambda name, message, level: None
+    return task
+
+
+@pytest.mark.parametrize("mirror", [False, True], ids=["copy", "mirror"])
+def test_unchanged_files_are_skipped(tmp_path, tree, mirror):
+    source, destination = tree
+    task = _task(tmp_path, source, destination, mirror=mirror)
+    assert task._execute()
+    assert task.plan().counts()[ACTION_SKIP] == 3
+
+
+@pytest.mark.parametrize("mirror", [False, True], ids=["copy", "mirror"])
+def test_deleted_and_damaged_copies_are_restored(tmp_path, tree, mirror):
+    source, destination = tree
+    task = _task(tmp_path, source, destination, mirror=mirror)
+    assert task._execute()
+
+    os.unlink(destination / "d" / "b.txt")
+    (destination / "d" / "c.txt").write_text("damaged")
+    actions = {entry.rel_path: action for action, entry in task.plan().actions}
+    assert actions == {"d/a.txt": ACTION_SKIP, "d/b.txt": ACTION_COPY, "d/c.txt": ACTION_UPDATE}
+
+    assert task._execute()
+    assert (destination / "d" / "b.txt").read_text() == "b" * 10
+    assert (destination / "d" / "c.txt").read_text() == "c" * 10
+
+
+def test_mirror_deletes_extra_files(tmp_path, tree):
+    source, destination = tree
+    task = _task(tmp_path, source, destination, mirror=True)
+    assert task._execute()
+
+    (destination / "extra.txt").write_text("not in source")
+    os.unlink(source / "d" / "a.txt")
+    assert sorted(task.plan().deletes) == ["d/a.txt", "extra.txt"]
+    assert task._execute()
+    assert sorted(os.listdir(destination / "d")) == ["b.txt", "c.txt"]
+    assert not (destination / "extra.txt").exists()
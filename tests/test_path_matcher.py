@@ -0,0 +1,82 @@
+"""
+PathMatcher Tests
+Anchoring, negation and directory rules of the include/exclude matcher
+"""
+
+from utils.path_matcher import PathMatcher
+
+
+def test_pattern_without_slash_matches_at_any_depth():
+    matcher = PathMatcher(exclude_patterns=["*.tmp"])
+    assert not matcher.matches("a.tmp")
+    assert not matcher.matches("deep/dir/a.tmp")
+    assert matcher.matches("a.txt")
+
+
+def test_pattern_with_slash_is_anchored_to_root():
+    matcher = PathMatcher(exclude_patterns=["build/*.o", "/top.txt"])
+    assert not matcher.matches("build/main.o")
+    assert matcher.matches("src/build/main.o")
+    assert not matcher.matches("top.txt")
+    assert matcher.matches("sub/top.txt")
+
+
+def test_double_star_matches_any_number_of_directories():
+    matcher = PathMatcher(exclude_patterns=["logs/**/*.log"])
+    assert not matcher.matches("logs/a.log")
+    assert not matcher.matches("logs/x/y/a.log")
+    assert matcher.matches("other/a.log")
+
+
+def test_negation_reincludes_file():
+    matcher = PathMatcher(exclude_patterns=["*.log", "!keep.log"])
+    assert not matcher.matches("debug.log")
+    assert matcher.matches("keep.log")
+    assert matcher.matches("sub/keep.log")
+
+
+def test_last_matching_rule_wins():
+    matcher = PathMatcher(exclude_patterns=["!keep.log", "*.log"])
+    assert not matcher.matches("keep.log")
+
+
+def test_excluded_directory_prunes_subtree():
+    matcher = PathMatcher(exclude_patterns=["node_modules"])
+    assert matcher.dir_excluded("node_modules")
+    assert matcher.dir_excluded("web/node_modules")
+    assert matcher.dir_pruned("web/node_modules/pkg")
+    assert not matcher.matches("web/node_modules/pkg/index.js")
+    assert matcher.matches("web/index.js")
+
+
+def test_directory_only_pattern_leaves_files_alone():
+    matcher = PathMatcher(exclude_patterns=["cache/"])
+    assert matcher.dir_excluded("cache")
+    assert not matcher.matches("cache/data.bin")
+    assert matcher.file_included("cache")
+
+
+def test_include_patterns_select_files_and_directories():
+    matcher = PathMatcher(include_patterns=["*.py", "docs/"])
+    assert matcher.matches("main.py")
+    assert matcher.matches("pkg/mod.py")
+    assert matcher.matches("docs/guide.md")
+    assert not matcher.matches("README.md")
+
+
+def test_include_negation():
+    matcher = PathMatcher(include_patterns=["*.py", "!test_*.py"])
+    assert matcher.matches("mod.py")
+    assert not matcher.matches("test_mod.py")
+
+
+def test_exclude_wins_over_include():
+    matcher = PathMatcher(include_patterns=["*.py"], exclude_patterns=["vendor"])
+    assert not matcher.matches("vendor/lib.py")
+    assert matcher.matches("src/lib.py")
+
+
+def test_empty_matcher_selects_everything():
+    matcher = PathMatcher()
+    assert matcher.matches("any/path/file.bin")
+    assert not matcher.dir_pruned("any/path")
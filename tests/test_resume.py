@@ -0,0 +1,120 @@
+"""
+Resume Tests
+Checkpoint journal and partial files of interrupted large copies
+"""
+
+import os
+
+import pytest
+
+import tasks.file_transfer_task as file_transfer_task
+from tasks.file_transfer_task import FileTransferTask
+from utils.transfer_journal import PARTIAL_SUFFIX, TransferJournal
+
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    # Small chunks and checkpoints keep the files of these tests small
+    monkeypatch.setattr(file_transfer_task, "DEFAULT_CHUNK_SIZE", MB)
+    monkeypatch.setattr(file_transfer_task, "CHECKPOINT_BYTES", MB)
+    source = tmp_path / "src"
+    source.mkdir()
+    (source / "small.txt").write_text("small")
+    (source / "big.bin").write_bytes(os.urandom(8 * MB))
+    return source, tmp_path / "dst"
+
+
+def _task(tmp_path, source, destination, logs, **options):
+    config = {
+        "source": str(source), "destination": str(destination), "large_file_threshold_mb": 1,
+        "manifest_dir": str(tmp_path / "manifests"), **options
+    }
+    task = FileTransferTask("resume", config)
+    task.on_log_message = lambda name, message, level: logs.append((level, message))
+    return task
+
+
+def _interrupt(tmp_path, source, destination, **options):
+    """Run a copy that stops once the partial file of big.bin holds 3 MB"""
+    part = destination / ("big.bin" + PARTIAL_SUFFIX)
+    task = _task(tmp_path, source, destination, [], **options)
+    task.is_stopped = lambda: part.exists() and part.stat().st_size >= 3 * MB
+    assert not task._execute()
+    assert part.stat().st_size >= 3 * MB
+    assert not (destination / "big.bin").exists()
+    return part
+
+
+def _journals(tmp_path):
+    directory = tmp_path / "manifests" / "journals"
+    return list(directory.iterdir()) if directory.exists() else []
+
+
+@pytest.mark.parametrize("options", [{}, {"mirror": True, "only_changed": True}], ids=["copy", "mirror"])
+def test_interrupted_copy_resumes(tmp_path, tree, options):
+    source, destination = tree
+    part = _interrupt(tmp_path, source, destination, **options)
+    assert len(_journals(tmp_path)) == 1
+
+    logs = []
+    assert _task(tmp_path, source, destination, logs, **options)._execute()
+    assert any(message.startswith("Resuming big.bin at") for _, message in logs)
+    assert not [message for level, message in logs if level in ("WARNING", "ERROR")]
+    assert (destination / "big.bin").read_bytes() == (source / "big.bin").read_bytes()
+    assert (destination / "small.txt").read_text() == "small"
+    assert not part.exists()
+    assert not _journals(tmp_path)
+
+
+def test_changed_source_discards_partial_file(tmp_path, tree):
+    source, destination = tree
+    part = _interrupt(tmp_path, source, destination)
+
+    (source / "big.bin").write_bytes(os.urandom(8 * MB))
+    st = (source / "big.bin").stat()
+    os.utime(source / "big.bin", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    logs = []
+    assert _task(tmp_path, source, destination, logs)._execute()
+    assert not any(message.startswith("Resuming big.bin") for _, message in logs)
+    assert (destination / "big.bin").read_bytes() == (source / "big.bin").read_bytes()
+    assert not part.exists()
+
+
+def test_partial_file_shorter_than_checkpoint_restarts(tmp_path, tree):
+    source, destination = tree
+    part = _interrupt(tmp_path, source, destination)
+    with open(part, "r+b") as f:
+        f.truncate(MB // 2)
+
+    logs = []
+    assert _task(tmp_path, source, destination, logs)._execute()
+    assert not any(message.startswith("Resuming big.bin") for _, message in logs)
+    assert (destination / "big.bin").read_bytes() == (source / "big.bin").read_bytes()
+
+
+def test_journal_round_trip(tmp_path):
+    journal = TransferJournal(tmp_path / "run.journal")
+    journal.open()
+    journal.record_done("a.txt", 10, 100)
+    journal.record_partial("big.bin", 8 * MB, 200, MB)
+    journal.record_partial("big.bin", 8 * MB, 200, 2 * MB)
+    journal.record_partial("done.bin", 4 * MB, 300, MB)
+    journal.record_done("done.bin", 4 * MB, 300)
+    journal.close()
+    with open(tmp_path / "run.journal", "a", encoding="utf-8") as f:
+        f.write('{"f": "torn')
+
+    loaded = TransferJournal(tmp_path / "run.journal")
+    assert loaded.load() == 2
+    assert loaded.is_done("a.txt", 10, 100)
+    assert not loaded.is_done("a.txt", 10, 101)
+    assert loaded.partial_offset("big.bin", 8 * MB, 200) == 2 * MB
+    assert loaded.partial_offset("big.bin", 8 * MB, 201) == 0
+    assert loaded.partial_offset("done.bin", 4 * MB, 300) == 0
+
+    loaded.discard()
+    assert not (tmp_path / "run.journal").exists()
+    assert TransferJournal(tmp_path / "run.journal").load() == 0
@@ -0,0 +1,84 @@
+"""
+Snapshot Tests
+Listing and daily/weekly retention of snapshot directories
+"""
+
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from utils.snapshots import (
+    expired_snapshots, list_partial_snapshots, list_snapshots, snapshot_name,
+    SNAPSHOT_PARTIAL_SUFFIX
+)
+
+
+def _snapshots(*times):
+    return [(when, Path(snapshot_name(when))) for when in sorted(times)]
+
+
+def test_list_snapshots_ignores_other_directories(tmp_path):
+    older = datetime(2024, 1, 1, 10, 0, 0)
+    newer = datetime(2024, 1, 2, 10, 0, 0)
+    for when in (newer, older):
+        (tmp_path / snapshot_name(when)).mkdir()
+    (tmp_path / "notes").mkdir()
+    (tmp_path / (snapshot_name(newer) + "x")).mkdir()
+    (tmp_path / (snapshot_name(datetime(2024, 1, 3)) + SNAPSHOT_PARTIAL_SUFFIX)).mkdir()
+    (tmp_path / snapshot_name(datetime(2024, 1, 4))).write_text("a file, not a snapshot")
+
+    assert list_snapshots(tmp_path) == [
+        (older, tmp_path / snapshot_name(older)),
+        (newer, tmp_path / snapshot_name(newer)),
+    ]
+    assert [p.name for p in list_partial_snapshots(tmp_path)] == ["2024-01-03_000000.partial"]
+
+
+def test_list_snapshots_of_missing_root():
+    assert list_snapshots(Path("/nonexistent/snapshot/root")) == []
+
+
+def test_keeps_newest_snapshot_per_day():
+    day = datetime(2024, 3, 10, 8, 0, 0)
+    snapshots = _snapshots(day, day + timedelta(hours=4),
+                           day + timedelta(days=1), day + timedelta(days=1, hours=4))
+    expired = expired_snapshots(snapshots, keep_daily=2, keep_weekly=0)
+    assert expired == [Path(snapshot_name(day)), Path(snapshot_name(day + timedelta(days=1)))]
+
+
+def test_daily_limit_counts_days_with_snapshots():
+    start = datetime(2024, 3, 1, 12, 0, 0)
+    # Gaps between the days do not count against the limit
+    times = [start + timedelta(days=offset) for offset in (0, 5, 9, 20)]
+    expired = expired_snapshots(_snapshots(*times), keep_daily=3, keep_weekly=0)
+    assert expired == [Path(snapshot_name(times[0]))]
+
+
+def test_weekly_keeps_newest_of_each_iso_week():
+    # Monday 2024-03-04 starts an ISO week
+    monday = datetime(2024, 3, 4, 12, 0, 0)
+    times = [monday + timedelta(days=offset) for offset in (0, 3, 7, 10, 14)]
+    expired = expired_snapshots(_snapshots(*times), keep_daily=0, keep_weekly=2)
+    kept = {Path(snapshot_name(times[i])) for i in (3, 4)}
+    assert set(expired) == {Path(snapshot_name(when)) for when in times} - kept
+
+
+def test_daily_and_weekly_keep_union():
+    monday = datetime(2024, 3, 4, 12, 0, 0)
+    times = [monday + timedelta(days=offset) for offset in range(21)]
+    expired = expired_snapshots(_snapshots(*times), keep_daily=3, keep_weekly=3)
+    kept = {Path(snapshot_name(when)) for when in times} - set(expired)
+    # Last three days, plus the Sundays ending the two earlier weeks
+    assert kept == {Path(snapshot_name(times[i])) for i in (6, 13, 18, 19, 20)}
+
+
+def test_keep_last_always_kept():
+    day = datetime(2024, 3, 10, 8, 0, 0)
+    times = [day + timedelta(hours=hour) for hour in range(5)]
+    expired = expired_snapshots(_snapshots(*times), keep_daily=1, keep_weekly=0, keep_last=3)
+    assert expired == [Path(snapshot_name(when)) for when in times[:2]]
+
+
+def test_no_limits_expire_nothing():
+    times = [datetime(2024, 1, day) for day in range(1, 10)]
+    assert expired_snapshots(_snapshots(*times), keep_daily=0, keep_weekly=0) == []
+    assert expired_snapshots([], keep_daily=1, keep_weekly=1) == []
@@ -0,0 +1,112 @@
+"""
+Stream Archive Tests
+Block-compressed archives and single-file extraction through the index
+"""
+
+import io
+import os
+import tarfile
+
+import pytest
+
+from utils.stream_archive import (
+    StreamArchiveWriter, ZSTD_AVAILABLE, extract_file, index_path, load_index, save_index
+)
+
+
+def _write_archive(tmp_path, files, compression="gzip", block_size=4096):
+    archive = tmp_path / f"test.tar.{'gz' if compression == 'gzip' else compression}"
+    writer = StreamArchiveWriter(archive, compression, threads=2, block_size=block_size)
+    for name, data in files.items():
+        path = tmp_path / "src" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        with open(path, 'rb') as fobj:
+            writer.add_file(fobj, name)
+    index = writer.close()
+    save_index(index_path(archive), index)
+    return archive, index
+
+
+@pytest.fixture
+def files():
+    # Sizes around the block size so files start and end inside blocks
+    return {
+        "empty.txt": b"",
+        "small.txt": b"hello",
+        "dir/spans.bin": os.urandom(10_000),
+        "dir/sub/exact.bin": os.urandom(4096),
+        "text.log": b"line\n" * 3000,
+    }
+
+
+@pytest.mark.parametrize("compression", ["gzip", "none"])
+def test_extract_file_returns_each_file(tmp_path, files, compression):
+    archive, _ = _write_archive(tmp_path, files, compression)
+    for name, data in files.items():
+        output = io.BytesIO()
+        assert extract_file(archive, name, output) == len(data)
+        assert output.getvalue() == data, name
+
+
+@pytest.mark.skipif(not ZSTD_AVAILABLE, reason="zstandard not installed")
+def test_extract_file_zstd(tmp_path, files):
+    archive, _ = _write_archive(tmp_path, files, "zstd")
+    output = io.BytesIO()
+    extract_file(archive, "dir/spans.bin", output)
+    assert output.getvalue() == files["dir/spans.bin"]
+
+
+def test_extract_file_with_given_index(tmp_path, files):
+    archive, index = _write_archive(tmp_path, files)
+    index_path(archive).unlink()
+    output = io.BytesIO()
+    extract_file(archive, "text.log", output, index)
+    assert output.getvalue() == files["text.log"]
+
+
+def test_extract_unknown_file(tmp_path, files):
+    archive, _ = _write_archive(tmp_path, files)
+    with pytest.raises(KeyError):
+        extract_file(archive, "missing.txt", io.BytesIO())
+
+
+def test_archive_readable_by_tarfile(tmp_path, files):
+    archive, _ = _write_archive(tmp_path, files)
+    with tarfile.open(archive) as tar:
+        assert sorted(tar.getnames()) == sorted(files)
+        assert tar.extractfile("dir/spans.bin").read() == files["dir/spans.bin"]
+
+
+def test_index_round_trip(tmp_path, files):
+    archive, index = _write_archive(tmp_path, files)
+    assert load_index(index_path(archive)) == index
+    assert len(index["blocks"]) > 1
+    assert set(index["files"]) == set(files)
+
+
+def test_archive_task_skips_file_deleted_after_scan(tmp_path, monkeypatch):
+    from tasks.file_transfer_task import FileTransferTask
+
+    source = tmp_path / "src"
+    source.mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (source / name).write_text(name * 10)
+    task = FileTransferTask("archive", {
+        "source": str(source), "destination": str(tmp_path / "dst"), "operation": "archive"
+    })
+    logs = []
+    task.on_log_message = lambda name, message, level: logs.append(message)
+
+    scan = task._scan_source
+
+    def scan_then_delete(*args, **kwargs):
+        entries = scan(*args, **kwargs)
+        (source / "b.txt").unlink()
+        return entries
+
+    monkeypatch.setattr(task, "_scan_source", scan_then_delete)
+    assert not task._execute()
+    assert any("Cannot read b.txt" in message for message in logs)
+    with tarfile.open(tmp_path / "dst" / "src.tar.gz") as tar:
+        assert sorted(tar.getnames()) == ["a.txt", "c.txt"]
@@ -0,0 +1,104 @@
+"""
+Tree Diff Tests
+Dict-based listing diffs and the NumPy merge against compact manifests
+"""
+
+import pytest
+
+from utils import tree_diff
+from utils.compact_manifest import CompactManifest, FileList
+from utils.file_scanner import ScanEntry
+from utils.fs_timestamps import EXACT_RULES, HOUR_NS, TimestampRules
+from utils.sync_manifest import SyncManifest
+
+
+BASE_MTIME = 1_700_000_000_000_000_000
+FAT_RULES = TimestampRules(2 * 10**9, hour_shift=True, ignore_inode=True)
+
+
+def _entry(i: int, mtime_offset: int = 0) -> ScanEntry:
+    rel_path = f"d{i % 7}/sub/f{i}.txt"
+    return ScanEntry(f"/src/{rel_path}", rel_path, i % 100, BASE_MTIME + i * 1_000_003 + mtime_offset, 10**6 + i)
+
+
+def _manifest(tmp_path, manifest_class, count: int = 500):
+    """A saved and reloaded manifest, then changed in memory"""
+    manifest = manifest_class(tmp_path / f"m{manifest_class.__name__}", "/src", "/dst")
+    for i in range(count):
+        if i % 11 == 0:
+            continue  # new in the scan
+        entry = _entry(i)
+        src_sig = list(entry.signature)
+        if i % 13 == 0:
+            src_sig[0] += 1  # size changed
+        elif i % 17 == 0:
+            src_sig[1] += HOUR_NS  # DST shift: changed unless the rules allow it
+        elif i % 19 == 0:
+            src_sig[1] += 10**9  # within FAT tolerance
+        elif i % 23 == 0:
+            src_sig[2] += 1  # inode changed
+        manifest.update(entry.rel_path, tuple(src_sig), (0, 0, 0))
+    manifest.update("removed/from/source.txt", (1, 2, 3), (1, 2, 3))
+    assert manifest.save()
+    if isinstance(manifest, CompactManifest):
+        manifest.close()
+
+    loaded = manifest_class(manifest.manifest_file)
+    assert loaded.load()
+    # Changes made after loading override or hide mapped rows
+    loaded.update(_entry(22).rel_path, _entry(22).signature, (0, 0, 0))
+    loaded.update("added/after/load.txt", (5, 5, 5), (0, 0, 0))
+    loaded.remove(_entry(1).rel_path)
+    return loaded
+
+
+def _scan(count: int = 500) -> FileList:
+    files = FileList("/src")
+    files.extend(_entry(i) for i in range(count))
+    return files
+
+
+def test_diff_listings_classifies_files():
+    source = [("a", (1, 10, 1)), ("b", (2, 20, 2)), ("c", (3, 30, 3))]
+    target = [("b", (2, 20, 2)), ("c", (3, 31, 3)), ("d", (4, 40, 4))]
+    diff = tree_diff.diff_listings(source, target)
+    assert (diff.new, diff.changed, diff.unchanged, diff.deleted) == ([0], [2], [1], ["d"])
+    assert diff.counts() == (1, 1, 1, 1)
+
+
+def test_diff_listings_applies_rules():
+    source = [("a", (1, 10**9, 1)), ("b", (1, HOUR_NS, 1))]
+    target = [("a", (1, 2 * 10**9, 9)), ("b", (1, 0, 1))]
+    assert tree_diff.diff_listings(source, target).unchanged == []
+    assert tree_diff.diff_listings(source, target, FAT_RULES).unchanged == [0, 1]
+
+
+def test_diff_manifest_matches_is_unchanged(tmp_path):
+    manifest = _manifest(tmp_path, SyncManifest)
+    scan = _scan()
+    for rules in (EXACT_RULES, FAT_RULES):
+        diff = tree_diff.diff_manifest(scan, manifest, rules)
+        expected = [pos for pos, entry in enumerate(scan)
+                    if manifest.is_unchanged(entry.rel_path, entry.signature, rules)]
+        assert diff.unchanged == expected
+        assert sorted(diff.deleted) == ["added/after/load.txt", "removed/from/source.txt"]
+
+
+@pytest.mark.parametrize("rules", [EXACT_RULES, FAT_RULES], ids=["exact", "fat"])
+@pytest.mark.parametrize("as_list", [False, True], ids=["filelist", "entries"])
+def test_numpy_diff_matches_dict_diff(tmp_path, monkeypatch, rules, as_list):
+    pytest.importorskip("numpy")
+    manifest = _manifest(tmp_path, CompactManifest)
+    scan = _scan()
+    entries = list(scan) if as_list else scan
+
+    vectorized = tree_diff.diff_manifest(entries, manifest, rules)
+    monkeypatch.setattr(tree_diff, "NUMPY_AVAILABLE", False)
+    expected = tree_diff.diff_manifest(entries, manifest, rules)
+
+    assert vectorized.new == expected.new
+    assert vectorized.changed == expected.changed
+    assert vectorized.unchanged == expected.unchanged
+    assert sorted(vectorized.deleted) == sorted(expected.deleted)
+    assert expected.counts()[0] and expected.counts()[1] and expected.counts()[2]
+    manifest.close()
@@ -0,0 +1,191 @@
+"""
+Two-Way Sync Tests
+Change propagation, deletions and conflict policies of sync mode
+"""
+
+import os
+
+import pytest
+
+from tasks.file_transfer_task import FileTransferTask
+
+
+BASE_TIME = 1_700_000_000
+
+
+def _write(path, text, age=0):
+    """Write a file with an mtime `age` seconds after BASE_TIME"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    os.utime(path, (BASE_TIME + age, BASE_TIME + age))
+
+
+@pytest.fixture
+def sides(tmp_path):
+    source = tmp_path / "a"
+    destination = tmp_path / "b"
+    source.mkdir()
+    destination.mkdir()
+    return source, destination
+
+
+def _sync(tmp_path, sides, **options):
+    source, destination = sides
+    config = {
+        "source": str(source), "destination": str(destination), "operation": "sync",
+        "manifest_dir": str(tmp_path / "manifests"), **options
+    }
+    task = FileTransferTask("sync", config)
+    task.on_log_message = lambda name, message, level: None
+    assert task.validate()[0]
+    return task._execute()
+
+
+def _conflict_copies(directory):
+    return [path.name for path in directory.iterdir() if ".sync-conflict-" in path.name]
+
+
+def test_first_sync_merges_both_sides(tmp_path, sides):
+    source, destination = sides
+    _write(source / "dir" / "from_a.txt", "a")
+    _write(destination / "from_b.txt", "b")
+    assert _sync(tmp_path, sides)
+    assert (destination / "dir" / "from_a.txt").read_text() == "a"
+    assert (source / "from_b.txt").read_text() == "b"
+
+
+def test_changes_are_copied_both_ways(tmp_path, sides):
+    source, destination = sides
+    _write(source / "one.txt", "1")
+    _write(source / "two.txt", "2")
+    assert _sync(tmp_path, sides)
+
+    _write(source / "one.txt", "1 changed in a", age=10)
+    _write(destination / "two.txt", "2 changed in b", age=10)
+    assert _sync(tmp_path, sides)
+    assert (destination / "one.txt").read_text() == "1 changed in a"
+    assert (source / "two.txt").read_text() == "2 changed in b"
+    assert not _conflict_copies(source) and not _conflict_copies(destination)
+
+
+def test_deletions_are_propagated(tmp_path, sides):
+    source, destination = sides
+    for name in ("gone_from_a.txt", "gone_from_b.txt", "kept.txt"):
+        _write(source / name, name)
+    assert _sync(tmp_path, sides)
+
+    (source / "gone_from_a.txt").unlink()
+    (destination / "gone_from_b.txt").unlink()
+    assert _sync(tmp_path, sides)
+    assert sorted(os.listdir(source)) == ["kept.txt"]
+    assert sorted(os.listdir(destination)) == ["kept.txt"]
+
+
+def test_deletion_loses_against_change_on_other_side(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "original")
+    assert _sync(tmp_path, sides)
+
+    (source / "file.txt").unlink()
+    _write(destination / "file.txt", "edited in b", age=10)
+    assert _sync(tmp_path, sides)
+    assert (source / "file.txt").read_text() == "edited in b"
+
+
+def test_deletions_restored_without_propagate_deletes(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "data")
+    assert _sync(tmp_path, sides)
+
+    (destination / "file.txt").unlink()
+    assert _sync(tmp_path, sides, propagate_deletes=False)
+    assert (destination / "file.txt").read_text() == "data"
+
+
+def test_conflict_newer_wins_and_keeps_other_version(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "original")
+    assert _sync(tmp_path, sides)
+
+    _write(source / "file.txt", "older edit in a", age=10)
+    _write(destination / "file.txt", "newer edit in b", age=20)
+    assert _sync(tmp_path, sides)
+    assert (source / "file.txt").read_text() == "newer edit in b"
+    assert (destination / "file.txt").read_text() == "newer edit in b"
+    kept = _conflict_copies(source)
+    assert len(kept) == 1
+    assert (source / kept[0]).read_text() == "older edit in a"
+
+
+def test_conflict_source_policy(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "original")
+    assert _sync(tmp_path, sides)
+
+    _write(source / "file.txt", "older edit in a", age=10)
+    _write(destination / "file.txt", "newer edit in b", age=20)
+    assert _sync(tmp_path, sides, conflict_policy="source")
+    assert (destination / "file.txt").read_text() == "older edit in a"
+    assert len(_conflict_copies(destination)) == 1
+
+
+def test_conflict_skip_policy_leaves_both_sides(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "original")
+    assert _sync(tmp_path, sides)
+
+    _write(source / "file.txt", "edit in a", age=10)
+    _write(destination / "file.txt", "edit in b", age=20)
+    assert _sync(tmp_path, sides, conflict_policy="skip")
+    assert (source / "file.txt").read_text() == "edit in a"
+    assert (destination / "file.txt").read_text() == "edit in b"
+    assert not _conflict_copies(source) and not _conflict_copies(destination)
+
+
+def test_files_differing_without_sync_state_are_conflicts(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "a version", age=10)
+    _write(destination / "file.txt", "b version", age=20)
+    assert _sync(tmp_path, sides)
+    assert (source / "file.txt").read_text() == "b version"
+    assert len(_conflict_copies(source)) == 1
+
+
+def test_trusted_destination_manifest_is_rejected(tmp_path, sides):
+    source, destination = sides
+    task = FileTransferTask("sync", {
+        "source": str(source), "destination": str(destination), "operation": "sync",
+        "trust_destination_manifest": True
+    })
+    is_valid, error = task.validate()
+    assert not is_valid
+    assert "trust" in error
+
+
+def test_edit_in_subdirectory_is_a_conflict_with_destination_manifest(tmp_path, sides):
+    source, destination = sides
+    for i in range(200):
+        _write(source / f"dir{i % 10}" / f"f{i}.txt", f"file {i}")
+    assert _sync(tmp_path, sides, destination_manifest=True)
+    assert (destination / ".autosync").is_dir()
+
+    # Edits inside a subdirectory leave the destination root's mtime alone
+    _write(destination / "dir3" / "f13.txt", "edited on the destination", age=10)
+    _write(source / "dir3" / "f13.txt", "edited locally", age=20)
+    assert _sync(tmp_path, sides, destination_manifest=True)
+    assert (destination / "dir3" / "f13.txt").read_text() == "edited locally"
+    kept = _conflict_copies(destination / "dir3")
+    assert len(kept) == 1
+    assert (destination / "dir3" / kept[0]).read_text() == "edited on the destination"
+
+
+def test_leftovers_of_interrupted_copies_are_not_synced(tmp_path, sides):
+    source, destination = sides
+    _write(source / "file.txt", "data")
+    assert _sync(tmp_path, sides)
+
+    # Left in the source by a copy from the destination that crashed
+    _write(source / "file.txt.autosync-tmp", "half written")
+    _write(source / "big.bin.autosync-part", "half written")
+    assert _sync(tmp_path, sides)
+    assert sorted(os.listdir(destination)) == ["file.txt"]
@@ -0,0 +1,75 @@
+"""
+Watch Mode Tests
+Applying batches of watched changes to the destination
+"""
+
+import pytest
+
+from tasks.file_transfer_task import FileTransferTask, TransferResult
+from utils.sync_manifest import SyncManifest
+
+
+@pytest.fixture
+def mirrored(tmp_path):
+    """A source and a mirrored destination with excluded and destination-only files"""
+    source = tmp_path / "src"
+    destination = tmp_path / "dst"
+    for root in (source, destination):
+        (root / "dir" / "sub").mkdir(parents=True)
+        (root / "dir" / "a.txt").write_text("a")
+        (root / "dir" / "sub" / "b.txt").write_text("b")
+        (root / "keep.txt").write_text("keep")
+    (destination / "debug.log").write_text("excluded")
+    (destination / "dir" / "sub" / "trace.log").write_text("excluded")
+    return source, destination
+
+
+def _task(source, destination):
+    task = FileTransferTask("watch", {
+        "source": str(source), "destination": str(destination),
+        "mirror": True, "exclude_patterns": ["*.log"]
+    })
+    task.on_log_message = lambda name, message, level: None
+    task._compile_patterns()
+    task._begin_timestamps(source, [destination])
+    return task
+
+
+def test_new_file_copies_only_that_file(mirrored):
+    source, destination = mirrored
+    (source / "dir" / "new.txt").write_text("new")
+    counts = _task(source, destination)._apply_changes(source, destination, ["dir/new.txt"], None)
+    assert counts[TransferResult.TRANSFERRED] == 1
+    assert (destination / "dir" / "new.txt").read_text() == "new"
+
+
+def test_deleted_excluded_file_is_kept(mirrored):
+    source, destination = mirrored
+    _task(source, destination)._apply_changes(source, destination, ["debug.log"], None)
+    assert (destination / "debug.log").exists()
+
+
+def test_deleted_file_is_removed(mirrored):
+    source, destination = mirrored
+    (source / "keep.txt").unlink()
+    _task(source, destination)._apply_changes(source, destination, ["keep.txt"], None)
+    assert not (destination / "keep.txt").exists()
+
+
+def test_removed_directory_keeps_excluded_files(mirrored, tmp_path):
+    source, destination = mirrored
+    manifest = SyncManifest(tmp_path / "manifest.json")
+    for rel_path in ("dir/a.txt", "dir/sub/b.txt", "keep.txt"):
+        manifest.update(rel_path, (1, 1, 1), (1, 1, 1))
+    (destination / "dir" / "empty").mkdir()
+    for path in (source / "dir" / "sub" / "b.txt", source / "dir" / "a.txt"):
+        path.unlink()
+    (source / "dir" / "sub").rmdir()
+    (source / "dir").rmdir()
+
+    _task(source, destination)._apply_changes(source, destination, ["dir"], manifest)
+    assert not (destination / "dir" / "a.txt").exists()
+    assert not (destination / "dir" / "sub" / "b.txt").exists()
+    assert not (destination / "dir" / "empty").exists()
+    assert (destination / "dir" / "sub" / "trace.log").read_text() == "excluded"
+    assert sorted(manifest.entries) == ["keep.txt"]
@@ -6,9 +6,25 @@ Helper modules for the application
 from .logger import CentralLogger, get_logger, init_logger, LogLevel
 from .config_manager import ConfigManager, get_config_manager, init_config_manager
 from .scheduler import TaskScheduler, get_scheduler, init_scheduler, ScheduleType
+from .sync_manifest import SyncManifest
+from .file_scanner import ScanEntry, scan_tree
+from .copy_engine import copy_file_chunked, CopyInterrupted
+from .path_matcher import PathMatcher
+from .file_watcher import FileWatcher
+from .transfer_stats import TransferStats
+from .transfer_journal import TransferJournal
+from .stream_archive import StreamArchiveWriter, extract_file
+from .transfer_plan import TransferPlan
+from .compact_manifest import CompactManifest, FileList
+from .tree_diff import TreeDiff, diff_manifest
 
 __all__ = [
     'CentralLogger', 'get_logger', 'init_logger', 'LogLevel',
     'ConfigManager', 'get_config_manager', 'init_config_manager',
-    'TaskScheduler', 'get_scheduler', 'init_scheduler', 'ScheduleType'
+    'TaskScheduler', 'get_scheduler', 'init_scheduler', 'ScheduleType',
+    'SyncManifest', 'ScanEntry', 'scan_tree',
+    'copy_file_chunked', 'CopyInterrupted', 'PathMatcher',
+    'FileWatcher', 'TransferStats', 'TransferJournal',
+    'StreamArchiveWriter', 'extract_file', 'TransferPlan',
+    'CompactManifest', 'FileList', 'TreeDiff', 'diff_manifest'
 ]
@@ -0,0 +1,539 @@
+"""
+Compact Manifest
+Memory-mapped binary manifest and column-wise file lists for huge trees
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .file_scanner import ScanEntry
+from .sync_manifest import SyncManifest, DEFAULT_MANIFEST_DIR, transfer_key
+
+
+MAGIC = b"ASCM"
+
+# Bytes of each file's content digest kept in the digest column
+DIGEST_SIZE = 16
+
+_NO_PARENT = 0xFFFFFFFF
+
+# magic, version, files, directories, names, name bytes, source, destination, algorithm
+_HEADER = struct.Struct("<4sIQIIQIII4x")
+
+
+def _key_hash(rel_path: str) -> int:
+    """64-bit hash a manifest's rows are sorted and searched by"""
+    return int.from_bytes(hashlib.blake2b(rel_path.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _native_join(root: str, rel_path: str) -> str:
+    """Full path of a '/' separated relative path"""
+    if os.sep != "/":
+        rel_path = rel_path.replace("/", os.sep)
+    return os.path.join(root, rel_path)
+
+
+class PathInterner:
+    """
+    Paths stored as interned components
+
+    Every distinct file or directory name is stored once, and every
+    directory once as (parent directory, name), so a path costs two
+    integers however deep it is and however often its names repeat.
+    """
+
+    def __init__(self):
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        self.dir_parent = array('I', [_NO_PARENT])
+        self.dir_name = array('I', [self.name_id("")])
+        self._dir_ids: Dict[str, int] = {"": 0}
+        self.dir_paths: List[str] = [""]
+
+    def name_id(self, name: str) -> int:
+        """Id of a path component, adding it if new"""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def dir_id(self, rel_dir: str) -> int:
+        """Id of a relative directory ('' for the root), adding it if new"""
+        dir_id = self._dir_ids.get(rel_dir)
+        if dir_id is None:
+            parent, _, name = rel_dir.rpartition("/")
+            parent_id = self.dir_id(parent)
+            dir_id = self._dir_ids[rel_dir] = len(self.dir_parent)
+            self.dir_parent.append(parent_id)
+            self.dir_name.append(self.name_id(name))
+            self.dir_paths.append(rel_dir)
+        return dir_id
+
+    def split(self, rel_path: str) -> Tuple[int, int]:
+        """(directory id, name id) of a relative file path"""
+        rel_dir, _, name = rel_path.rpartition("/")
+        return self.dir_id(rel_dir), self.name_id(name)
+
+    def join(self, dir_id: int, name_id: int) -> str:
+        """Relative file path of (directory id, name id)"""
+        rel_dir = self.dir_paths[dir_id]
+        name = self.names[name_id]
+        return f"{rel_dir}/{name}" if rel_dir else name
+
+
+class FileList:
+    """
+    Scan results stored column-wise
+
+    Holds what a list of ScanEntry objects holds in about 40 bytes per
+    file plus its name's UTF-8 bytes, instead of two path strings and an
+    object per file; directories are interned. Iterating yields
+    short-lived ScanEntry objects, so the transfer pipeline can run over
+    millions of files without keeping one per file alive.
+    """
+
+    def __init__(self, root: str):
+        """
+        Initialize file list
+
+        Args:
+            root: Directory the relative paths are relative to
+        """
+        self.root = str(root)
+        self._paths = PathInterner()
+        self._dirs = array('I')
+        self._name_blob = bytearray()
+        self._name_ends = array('Q')
+        self._sizes = array('q')
+        self._mtimes = array('q')
+        self._inos = array('Q')
+
+    def append(self, entry: ScanEntry):
+        """Add a scanned file"""
+        rel_dir, _, name = entry.rel_path.rpartition("/")
+        self._dirs.append(self._paths.dir_id(rel_dir))
+        self._name_blob += name.encode("utf-8")
+        self._name_ends.append(len(self._name_blob))
+        self._sizes.append(entry.size)
+        self._mtimes.append(entry.mtime_ns)
+        self._inos.append(entry.ino)
+
+    def extend(self, entries):
+        """Add scanned files"""
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __iter__(self) -> Iterator[ScanEntry]:
+        for i, rel_path in enumerate(self.rel_paths()):
+            yield ScanEntry(_native_join(self.root, rel_path), rel_path,
+                            self._sizes[i], self._mtimes[i], self._inos[i])
+
+    def rel_paths(self) -> Iterator[str]:
+        """Relative paths of all files, without building entries"""
+        dir_paths = self._paths.dir_paths
+        blob = self._name_blob
+        start = 0
+        for i, end in enumerate(self._name_ends):
+            name = blob[start:end].decode("utf-8")
+            rel_dir = dir_paths[self._dirs[i]]
+            yield f"{rel_dir}/{name}" if rel_dir else name
+            start = end
+
+    def columns(self) -> Tuple[List[str], array, array, array]:
+        """(relative paths, sizes, mtimes, inodes) with the numbers as arrays"""
+        return list(self.rel_paths()), self._sizes, self._mtimes, self._inos
+
+    @property
+    def total_size(self) -> int:
+        """Sum of all file sizes"""
+        return sum(self._sizes)
+
+
+class _MappedTable:
+    """Column views over a memory-mapped manifest file"""
+
+    def __init__(self, path: Path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self._file.close()
+            raise
+        self._views = []
+        self._buffer = self._view(memoryview(self._map))
+        try:
+            self._parse()
+        except (ValueError, TypeError, struct.error):
+            self.close()
+            raise ValueError("Not a compact manifest")
+
+    def _parse(self):
+        """Locate the sections of the file"""
+        (magic, version, count, n_dirs, n_names, blob_len,
+         source_len, destination_len, algorithm_len) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != CompactManifest.FORMAT_VERSION:
+            raise ValueError("Not a compact manifest")
+
+        self.count = count
+        self._offset = _HEADER.size
+        self.source = self._text(source_len)
+        self.destination = self._text(destination_len)
+        self.algorithm = self._text(algorithm_len)
+        self._name_offsets = self._column('Q', n_names + 1)
+        self._blob = self._section(blob_len)
+        self._dir_parent = self._column('I', n_dirs)
+        self._dir_name = self._column('I', n_dirs)
+        self.hashes = self._column('Q', count)
+        self._dirs = self._column('I', count)
+        self._names = self._column('I', count)
+        self._stats = self._column('q', count * 4)
+        self._inos = self._column('Q', count * 2)
+        self._digests = self._section(count * DIGEST_SIZE)
+        if self._offset > len(self._map):
+            raise ValueError("Truncated compact manifest")
+        self._dir_paths: Dict[int, str] = {}
+
+    def _view(self, view: memoryview) -> memoryview:
+        self._views.append(view)
+        return view
+
+    def _section(self, size: int) -> memoryview:
+        """Next section of the file, each starting 8-byte aligned"""
+        start = self._offset
+        self._offset = start + size + (-size % 8)
+        return self._view(self._buffer[start:start + size])
+
+    def _column(self, fmt: str, count: int) -> memoryview:
+        return self._view(self._section(count * array(fmt).itemsize).cast(fmt))
+
+    def _text(self, size: int) -> str:
+        return bytes(self._section(size)).decode("utf-8")
+
+    def _name(self, name_id: int) -> str:
+        return bytes(self._blob[self._name_offsets[name_id]:self._name_offsets[name_id + 1]]).decode("utf-8")
+
+    def _dir_path(self, dir_id: int) -> str:
+        path = self._dir_paths.get(dir_id)
+        if path is None:
+            parent = self._dir_parent[dir_id]
+            name = self._name(self._dir_name[dir_id])
+            if parent == _NO_PARENT:
+                path = ""
+            else:
+                parent_path = self._dir_path(parent)
+                path = f"{parent_path}/{name}" if parent_path else name
+            self._dir_paths[dir_id] = path
+        return path
+
+    def rel_path(self, row: int) -> str:
+        rel_dir = self._dir_path(self._dirs[row])
+        name = self._name(self._names[row])
+        return f"{rel_dir}/{name}" if rel_dir else name
+
+    def find(self, rel_path: str) -> int:
+        """Row of a path, or -1"""
+        key = _key_hash(rel_path)
+        row = bisect_left(self.hashes, key)
+        while row < self.count and self.hashes[row] == key:
+            if self.rel_path(row) == rel_path:
+                return row
+            row += 1
+        return -1
+
+    def value(self, row: int) -> List[int]:
+        """Entry of a row in SyncManifest layout (source and destination signatures)"""
+        stats, inos = self._stats, self._inos
+        return [stats[row * 4], stats[row * 4 + 1], inos[row * 2],
+                stats[row * 4 + 2], stats[row * 4 + 3], inos[row * 2 + 1]]
+
+    def digest(self, row: int) -> bytes:
+        return bytes(self._digests[row * DIGEST_SIZE:(row + 1) * DIGEST_SIZE])
+
+    def close(self):
+        """Release all views and unmap the file"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+
+class _CompactEntries(MutableMapping):
+    """
+    Manifest entries backed by a mapped table plus in-memory changes
+
+    Reads go to the changes first, then to the table. Only entries
+    updated during a run live in Python objects; the rest stay in the
+    mapped file until the manifest is saved.
+    """
+
+    def __init__(self, table: Optional[_MappedTable] = None):
+        self.table = table
+        self.changed: Dict[str, List[int]] = {}
+        self.removed: Set[str] = set()
+        self._changed_in_table = 0
+
+    def _row(self, key: str) -> int:
+        return self.table.find(key) if self.table is not None else -1
+
+    def __getitem__(self, key: str) -> List[int]:
+        value = self.changed.get(key)
+        if value is not None:
+            return value
+        if key not in self.removed:
+            row = self._row(key)
+            if row >= 0:
+                return self.table.value(row)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: List[int]):
+        if key not in self.changed:
+            self.removed.discard(key)
+            if self._row(key) >= 0:
+                self._changed_in_table += 1
+        self.changed[key] = value
+
+    def __delitem__(self, key: str):
+        in_table = key not in self.removed and self._row(key) >= 0
+        if key in self.changed:
+            del self.changed[key]
+            if in_table:
+                self._changed_in_table -= 1
+        elif not in_table:
+            raise KeyError(key)
+        if in_table:
+            self.removed.add(key)
+
+    def table_rows(self) -> Iterator[Tuple[int, str]]:
+        """(row, path) of table entries not changed or removed"""
+        if self.table is None:
+            return
+        for row in range(self.table.count):
+            key = self.table.rel_path(row)
+            if key not in self.changed and key not in self.removed:
+                yield row, key
+
+    def __iter__(self) -> Iterator[str]:
+        for _, key in self.table_rows():
+            yield key
+        yield from list(self.changed)
+
+    def items(self):
+        for row, key in self.table_rows():
+            yield key, self.table.value(row)
+        yield from list(self.changed.items())
+
+    def __len__(self) -> int:
+        table_count = self.table.count if self.table is not None else 0
+        return table_count - len(self.removed) - self._changed_in_table + len(self.changed)
+
+
+class CompactManifest(SyncManifest):
+    """
+    Sync manifest in a memory-mapped binary file
+
+    Paths are stored as interned components and the signatures and
+    content digests as fixed-width columns, with rows sorted by a 64-bit
+    path hash. Looking a path up is a binary search in the mapped file,
+    so a manifest of millions of files costs page cache instead of a
+    Python dict of lists (several hundred bytes per file). Entries
+    changed during a run are kept in memory and merged on save.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, manifest_file: Path, source: str = "", destination: str = ""):
+        super().__init__(manifest_file, source, destination)
+        self.entries = _CompactEntries()
+        self.digest_algorithm = ""
+        self._digests: Dict[str, bytes] = {}
+
+    @classmethod
+    def for_transfer(cls, source: Path, destination: Path,
+                     manifest_dir: Optional[str] = None) -> "CompactManifest":
+        """Get the compact manifest for a source/destination pair"""
+        directory = Path(manifest_dir or DEFAULT_MANIFEST_DIR)
+        return cls(directory / f"{transfer_key(source, destination)}.bin",
+                   str(Path(source).resolve()), str(Path(destination).resolve()))
+
+    def load(self) -> bool:
+        """
+        Map the manifest file
+
+        A JSON manifest of the same pair is imported if no binary one
+        exists yet (it is written in binary on the next save).
+
+        Returns:
+            True if an existing manifest was loaded
+        """
+        self.close()
+        self._dirty = False
+        self._digests = {}
+
+        try:
+            table = _MappedTable(self.manifest_file)
+        except (OSError, ValueError):
+            legacy = SyncManifest(self.manifest_file.with_suffix(".json"))
+            if not legacy.load():
+                return False
+            self.entries.changed = legacy.entries
+            self._dirty = True
+            return True
+
+        self.entries = _CompactEntries(table)
+        self.digest_algorithm = table.algorithm
+        return True
+
+    def close(self):
+        """Unmap the manifest file"""
+        if self.entries.table is not None:
+            self.entries.table.close()
+        self.entries = _CompactEntries()
+
+    def recorded_columns(self) -> Tuple[memoryview, memoryview, memoryview, List[int]]:
+        """
+        Columns of the mapped rows, for comparing them without a lookup per file
+
+        Returns:
+            (hashes, stats, inodes, hidden): the ascending path hash of
+            each row ('Q'), four values per row ('q': source size, source
+            mtime, destination size, destination mtime), two inode numbers
+            per row ('Q': source, destination) and the rows replaced or
+            removed since loading (see entries.changed)
+        """
+        entries = self.entries
+        table = entries.table
+        hidden = [row for row in map(table.find, chain(entries.changed, entries.removed)) if row >= 0]
+        return table.hashes, table._stats, table._inos, hidden
+
+    def digest(self, rel_path: str) -> Optional[bytes]:
+        """Recorded content digest of a file, None if unknown"""
+        digest = self._digests.get(rel_path)
+        if digest is not None:
+            return digest or None
+        entries = self.entries
+        if entries.table is None or rel_path in entries.changed or rel_path in entries.removed:
+            return None
+        row = entries.table.find(rel_path)
+        digest = entries.table.digest(row) if row >= 0 else b""
+        return digest if digest.strip(b"\0") else None
+
+    def set_digest(self, rel_path: str, digest: str, algorithm: str):
+        """
+        Record the content digest of a file as last verified
+
+        Args:
+            rel_path: Relative path key
+            digest: Hex digest (truncated to DIGEST_SIZE bytes)
+            algorithm: Hash algorithm of the digest
+        """
+        if algorithm != self.digest_algorithm:
+            # Digests of another algorithm cannot be compared; drop them
+            self.digest_algorithm = algorithm
+            self._digests = {key: b"" for key in self._digests}
+            if self.entries.table is not None:
+                self.entries.table.algorithm = ""
+        self._digests[rel_path] = bytes.fromhex(digest)[:DIGEST_SIZE].ljust(DIGEST_SIZE, b"\0")
+        self._dirty = True
+
+    def save(self) -> bool:
+        """Write the manifest if it changed (atomic replace) and map it again"""
+        if not self._dirty:
+            return True
+
+        entries = self.entries
+        table = entries.table
+        keep_table_digests = table is not None and table.algorithm == self.digest_algorithm
+        paths = PathInterner()
+        hashes = array('Q')
+        dirs = array('I')
+        names = array('I')
+        stats = array('q')
+        inos = array('Q')
+        digests = bytearray()
+        empty_digest = bytes(DIGEST_SIZE)
+
+        def add(key: str, value: List[int], digest: bytes):
+            dir_id, name_id = paths.split(key)
+            hashes.append(_key_hash(key))
+            dirs.append(dir_id)
+            names.append(name_id)
+            stats.extend((value[0], value[1], value[3], value[4]))
+            inos.extend((value[2], value[5]))
+            digests.extend(digest)
+
+        for row, key in entries.table_rows():
+            digest = self._digests.get(key)
+            if digest is None:
+                digest = table.digest(row) if keep_table_digests else empty_digest
+            add(key, table.value(row), digest or empty_digest)
+        for key, value in entries.changed.items():
+            add(key, value, self._digests.get(key) or empty_digest)
+
+        order = sorted(range(len(hashes)), key=hashes.__getitem__)
+        blob = bytearray()
+        name_offsets = array('Q', [0])
+        for name in paths.names:
+            blob.extend(name.encode("utf-8"))
+            name_offsets.append(len(blob))
+        source = self.source.encode("utf-8")
+        destination = self.destination.encode("utf-8")
+        algorithm = self.digest_algorithm.encode("utf-8")
+
+        def pad(f, size: int):
+            f.write(bytes(-size % 8))
+
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.manifest_file.with_suffix(".tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, self.FORMAT_VERSION, len(hashes), len(paths.dir_parent),
+                                     len(paths.names), len(blob), len(source), len(destination),
+                                     len(algorithm)))
+                for data in (source, destination, algorithm, name_offsets.tobytes(), blob,
+                             paths.dir_parent.tobytes(), paths.dir_name.tobytes()):
+                    f.write(data)
+                    pad(f, len(data))
+                for column, width in ((hashes, 1), (dirs, 1), (names, 1), (stats, 4), (inos, 2)):
+                    if width == 1:
+                        data = array(column.typecode, map(column.__getitem__, order))
+                    else:
+                        data = array(column.typecode)
+                        for i in order:
+                            data.extend(column[i * width:(i + 1) * width])
+                    f.write(data.tobytes())
+                    pad(f, len(data) * data.itemsize)
+                f.write(b"".join(digests[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE] for i in order))
+        except OSError:
+            return False
+
+        # The mapping must be closed before the file can be replaced on Windows
+        changed, removed, pending_digests = entries.changed, entries.removed, self._digests
+        self.close()
+        try:
+            os.replace(tmp_file, self.manifest_file)
+        except OSError:
+            # Map the old file again and keep this run's changes pending
+            self.load()
+            for key in removed:
+                self.entries.pop(key, None)
+            for key, value in changed.items():
+                self.entries[key] = value
+            self._digests = pending_digests
+            self._dirty = True
+            return False
+
+        return self.load()
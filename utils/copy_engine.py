@@ -0,0 +1,332 @@
+"""
+Copy Engine
+Chunked, interruptible file copy using kernel copy paths where available
+"""
+
+import errno
+import os
+import shutil
+import sys
+from pathlib import Path
+from concurrent.futures import Executor
+from typing import Callable, List, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# ioctl request for a copy-on-write clone (linux/fs.h: _IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+# Copy methods, fastest first
+METHOD_CLONE = "clone"
+METHOD_COPY2 = "copy2"
+METHOD_DELTA = "delta"
+METHOD_COPY_FILE_RANGE = "copy_file_range"
+METHOD_SENDFILE = "sendfile"
+METHOD_BUFFERED = "buffered"
+METHOD_FANOUT = "fanout"
+
+# Errors that mean "this kernel path is not available here", not "copy failed"
+_FALLBACK_ERRNOS = {
+    errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF, errno.ENOTTY,
+    getattr(errno, "EOPNOTSUPP", errno.EINVAL),
+    getattr(errno, "ENOTSUP", errno.EINVAL),
+}
+
+
+class CopyInterrupted(Exception):
+    """Raised when a chunked copy is stopped between chunks"""
+    pass
+
+
+def clone_supported() -> bool:
+    """Check if reflink cloning can be attempted on this platform"""
+    return FCNTL_AVAILABLE and sys.platform.startswith("linux")
+
+
+def clone_file(src: Path, dst: Path) -> bool:
+    """
+    Clone a file with a copy-on-write reflink (ioctl FICLONE)
+
+    On btrfs, xfs (reflink=1) and similar filesystems the destination
+    shares the source's data blocks, so the clone is near-instant and
+    uses no extra space until either file is modified. Metadata is copied
+    like shutil.copy2.
+
+    Returns:
+        True if cloned, False if cloning is not possible for these files
+        (different filesystems, unsupported filesystem or platform)
+
+    Raises:
+        OSError: On errors unrelated to clone support
+    """
+    if not clone_supported():
+        return False
+
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError as e:
+            if e.errno in _FALLBACK_ERRNOS:
+                return False
+            raise
+
+    shutil.copystat(src, dst)
+    return True
+
+
+def _available_methods() -> list:
+    """Copy methods supported by this platform, fastest first"""
+    methods = []
+    if hasattr(os, "copy_file_range"):
+        methods.append(METHOD_COPY_FILE_RANGE)
+    if hasattr(os, "sendfile") and sys.platform.startswith("linux"):
+        # macOS sendfile only supports sockets as the destination
+        methods.append(METHOD_SENDFILE)
+    methods.append(METHOD_BUFFERED)
+    return methods
+
+
+def _copy_chunk(method: str, fsrc, fdst, offset: int, count: int, buffer: memoryview) -> int:
+    """Copy up to count bytes at offset; returns bytes written (0 at EOF)"""
+    if method == METHOD_COPY_FILE_RANGE:
+        return os.copy_file_range(fsrc.fileno(), fdst.fileno(), count, offset, offset)
+
+    if method == METHOD_SENDFILE:
+        os.lseek(fdst.fileno(), offset, os.SEEK_SET)
+        return os.sendfile(fdst.fileno(), fsrc.fileno(), offset, count)
+
+    fsrc.seek(offset)
+    fdst.seek(offset)
+    read = fsrc.readinto(buffer[:count])
+    if not read:
+        return 0
+    view = buffer[:read]
+    written = 0
+    while written < read:
+        written += fdst.write(view[written:])
+    return read
+
+
+def copy_file_chunked(src: Path, dst: Path,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      should_stop: Optional[Callable[[], bool]] = None,
+                      wait_if_paused: Optional[Callable[[], None]] = None,
+                      on_progress: Optional[Callable[[int, int], None]] = None,
+                      resume_offset: int = 0,
+                      keep_partial: bool = False,
+                      fsync: bool = False) -> str:
+    """
+    Copy a file in chunks, checking for pause/stop between chunks
+
+    Uses os.copy_file_range (in-kernel, may reflink or offload to the
+    storage) or os.sendfile where available and falls back to a buffered
+    copy when the kernel path is not supported for these files. Metadata
+    is copied like shutil.copy2.
+
+    Args:
+        src: Source file
+        dst: Destination file (overwritten)
+        chunk_size: Bytes copied between pause/stop checks
+        should_stop: Returns True when the copy must be abandoned
+        wait_if_paused: Blocks while the copy is paused
+        on_progress: Called with (bytes_copied, total_bytes) after each chunk
+        resume_offset: Continue an earlier partial copy of dst from this
+            offset instead of starting over
+        keep_partial: Keep the partial destination when interrupted
+        fsync: Flush the destination to the device before closing it
+
+    Returns:
+        Name of the copy method that finished the copy
+
+    Raises:
+        CopyInterrupted: If should_stop returned True (the partial
+            destination file is removed unless keep_partial is set)
+        OSError: On I/O errors
+    """
+    methods = _available_methods()
+    method = methods.pop(0)
+    buffer = None
+
+    try:
+        dst_mode = 'r+b' if resume_offset > 0 else 'wb'
+        with open(src, 'rb', buffering=0) as fsrc, open(dst, dst_mode, buffering=0) as fdst:
+            size = os.fstat(fsrc.fileno()).st_size
+            copied = min(resume_offset, size)
+            if copied:
+                fdst.truncate(copied)
+
+            while copied < size:
+                if wait_if_paused:
+                    wait_if_paused()
+                if should_stop and should_stop():
+                    raise CopyInterrupted(f"Copy of {src} interrupted")
+
+                count = min(chunk_size, size - copied)
+                if method == METHOD_BUFFERED and buffer is None:
+                    buffer = memoryview(bytearray(chunk_size))
+
+                try:
+                    written = _copy_chunk(method, fsrc, fdst, copied, count, buffer)
+                except OSError as e:
+                    if not methods or e.errno not in _FALLBACK_ERRNOS:
+                        raise
+                    method = methods.pop(0)
+                    continue
+
+                if written == 0:
+                    # Source shrank while copying
+                    break
+
+                copied += written
+                if on_progress:
+                    on_progress(copied, size)
+
+            if fsync:
+                os.fsync(fdst.fileno())
+    except CopyInterrupted:
+        if not keep_partial:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+        raise
+
+    shutil.copystat(src, dst)
+    return method
+
+
+def _write_all(fdst, data: bytes):
+    """Write a whole block to an unbuffered file"""
+    view = memoryview(data)
+    written = 0
+    while written < len(view):
+        written += fdst.write(view[written:])
+
+
+def copy_file_fanout(src: Path, dsts: List[Path],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     should_stop: Optional[Callable[[], bool]] = None,
+                     wait_if_paused: Optional[Callable[[], None]] = None,
+                     on_progress: Optional[Callable[[int, int], None]] = None,
+                     fsync: bool = False,
+                     executor: Optional[Executor] = None) -> List[Optional[OSError]]:
+    """
+    Copy one file to several destinations, reading the source once
+
+    Each chunk is read once and written to all destinations; with an
+    executor the writes run concurrently, and the next chunk is read
+    while the previous one is still being written. A destination that
+    fails is dropped and the others continue.
+
+    Args:
+        src: Source file
+        dsts: Destination files (created or truncated)
+        chunk_size: Bytes per chunk
+        should_stop: Returns True when the copy must be abandoned
+        wait_if_paused: Blocks while the transfer is paused
+        on_progress: Called with (bytes_read, total_bytes) after each chunk
+        fsync: Flush each destination to the device before closing it
+        executor: Runs the per-destination writes concurrently (inline if None)
+
+    Returns:
+        Error per destination, None where the copy succeeded (failed
+        destination files are removed)
+
+    Raises:
+        CopyInterrupted: If should_stop returned True (all destination
+            files are removed)
+        OSError: If the source cannot be read (all destination files are removed)
+    """
+    errors: List[Optional[OSError]] = [None] * len(dsts)
+    outputs = []
+
+    def run(call, *args):
+        if executor is None:
+            call(*args)
+            return None
+        return executor.submit(call, *args)
+
+    def settle(pending):
+        for future in pending:
+            if future is not None:
+                future.result()
+
+    def write_block(index, block):
+        try:
+            _write_all(outputs[index], block)
+        except OSError as e:
+            errors[index] = e
+
+    try:
+        with open(src, 'rb', buffering=0) as fsrc:
+            size = os.fstat(fsrc.fileno()).st_size
+            for index, dst in enumerate(dsts):
+                try:
+                    outputs.append(open(dst, 'wb', buffering=0))
+                except OSError as e:
+                    outputs.append(None)
+                    errors[index] = e
+
+            copied = 0
+            pending = []
+            while True:
+                if wait_if_paused:
+                    wait_if_paused()
+                if should_stop and should_stop():
+                    settle(pending)
+                    raise CopyInterrupted(f"Copy of {src} interrupted")
+
+                # Read ahead while the previous chunk is being written
+                block = fsrc.read(chunk_size)
+                settle(pending)
+                live = [i for i, fdst in enumerate(outputs) if fdst is not None and errors[i] is None]
+                if not block or not live:
+                    break
+
+                pending = [run(write_block, i, block) for i in live]
+                copied += len(block)
+                if on_progress:
+                    on_progress(copied, size)
+
+            for index, fdst in enumerate(outputs):
+                if fdst is None or errors[index] is not None:
+                    continue
+                try:
+                    if fsync:
+                        os.fsync(fdst.fileno())
+                except OSError as e:
+                    errors[index] = e
+    except BaseException:
+        for fdst in outputs:
+            if fdst is not None:
+                fdst.close()
+        for dst in dsts:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+        raise
+
+    for index, (fdst, dst) in enumerate(zip(outputs, dsts)):
+        if fdst is None:
+            continue
+        fdst.close()
+        if errors[index] is None:
+            try:
+                shutil.copystat(src, dst)
+            except OSError as e:
+                errors[index] = e
+        if errors[index] is not None:
+            try:
+                os.unlink(dst)
+            except OSError:
+                pass
+
+    return errors
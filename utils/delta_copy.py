@@ -0,0 +1,156 @@
+"""
+Delta Copy
+Block-signature delta transfer for large files that change in place
+"""
+
+import hashlib
+import os
+import shutil
+import struct
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .copy_engine import CopyInterrupted
+
+
+DELTA_BLOCK_SIZE = 128 * 1024
+DIGEST_SIZE = 16
+
+# magic, block size, destination size, destination mtime_ns, block count
+_SIG_HEADER = struct.Struct("<8sQQqQ")
+_SIG_MAGIC = b"ASYNCSIG"
+
+
+def _block_digest(block: bytes) -> bytes:
+    """Strong signature of one block"""
+    return hashlib.blake2b(block, digest_size=DIGEST_SIZE).digest()
+
+
+def load_signatures(sig_file: Path, dst_stat: os.stat_result,
+                    block_size: int = DELTA_BLOCK_SIZE) -> Optional[List[bytes]]:
+    """
+    Load cached block signatures of a destination file
+
+    Signatures are only returned if they were computed for a destination
+    with the same size, mtime and block size, so the destination does not
+    have to be read again.
+    """
+    try:
+        with open(sig_file, 'rb') as f:
+            header = f.read(_SIG_HEADER.size)
+            if len(header) != _SIG_HEADER.size:
+                return None
+            magic, sig_block_size, size, mtime_ns, count = _SIG_HEADER.unpack(header)
+            if (magic != _SIG_MAGIC or sig_block_size != block_size
+                    or size != dst_stat.st_size or mtime_ns != dst_stat.st_mtime_ns):
+                return None
+            data = f.read(count * DIGEST_SIZE)
+    except OSError:
+        return None
+
+    if len(data) != count * DIGEST_SIZE:
+        return None
+    return [data[i:i + DIGEST_SIZE] for i in range(0, len(data), DIGEST_SIZE)]
+
+
+def save_signatures(sig_file: Path, dst_stat: os.stat_result, signatures: List[bytes],
+                    block_size: int = DELTA_BLOCK_SIZE) -> bool:
+    """Cache block signatures of a destination file"""
+    try:
+        sig_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = sig_file.with_suffix(".tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(_SIG_HEADER.pack(_SIG_MAGIC, block_size, dst_stat.st_size,
+                                     dst_stat.st_mtime_ns, len(signatures)))
+            f.write(b"".join(signatures))
+        os.replace(tmp_file, sig_file)
+        return True
+    except OSError:
+        return False
+
+
+def compute_signatures(fobj, block_size: int = DELTA_BLOCK_SIZE,
+                       should_stop: Optional[Callable[[], bool]] = None) -> List[bytes]:
+    """Compute block signatures of an open binary file"""
+    signatures = []
+    fobj.seek(0)
+    while True:
+        if should_stop and should_stop():
+            raise CopyInterrupted("Signature computation interrupted")
+        block = fobj.read(block_size)
+        if not block:
+            break
+        signatures.append(_block_digest(block))
+    return signatures
+
+
+def delta_copy_file(src: Path, dst: Path,
+                    signatures: Optional[List[bytes]] = None,
+                    block_size: int = DELTA_BLOCK_SIZE,
+                    should_stop: Optional[Callable[[], bool]] = None,
+                    wait_if_paused: Optional[Callable[[], None]] = None,
+                    on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[List[bytes], int]:
+    """
+    Update an existing file in place, writing only changed blocks
+
+    Callers pass a private copy of the destination (a reflink clone) and
+    rename it into place afterwards, so the update is never seen half done.
+
+    The source is read block by block and each block's signature is
+    compared with the destination block at the same offset; only blocks
+    that differ are written, and the destination is truncated to the
+    source size. Blocks are compared at aligned offsets, which matches how
+    database files and disk images change (in place, no insertions).
+
+    Args:
+        src: Source file
+        dst: Existing file to update (a clone of the destination)
+        signatures: Cached destination block signatures (read from dst if None)
+        block_size: Block size in bytes
+        should_stop: Returns True when the transfer must be abandoned
+        wait_if_paused: Blocks while the transfer is paused
+        on_progress: Called with (bytes_processed, total_bytes) after each block
+
+    Returns:
+        Tuple of (signatures of the new destination, bytes written)
+
+    Raises:
+        CopyInterrupted: If should_stop returned True (dst is left partially
+            updated; callers discard it)
+        OSError: On I/O errors
+    """
+    size = os.stat(src).st_size
+    new_signatures = []
+    written = 0
+    offset = 0
+
+    with open(src, 'rb') as fsrc, open(dst, 'r+b') as fdst:
+        if signatures is None:
+            signatures = compute_signatures(fdst, block_size, should_stop)
+
+        while offset < size:
+            if wait_if_paused:
+                wait_if_paused()
+            if should_stop and should_stop():
+                raise CopyInterrupted(f"Delta copy of {src} interrupted")
+
+            block = fsrc.read(block_size)
+            if not block:
+                break
+
+            digest = _block_digest(block)
+            index = len(new_signatures)
+            if index >= len(signatures) or signatures[index] != digest:
+                fdst.seek(offset)
+                fdst.write(block)
+                written += len(block)
+
+            new_signatures.append(digest)
+            offset += len(block)
+            if on_progress:
+                on_progress(offset, size)
+
+        fdst.truncate(offset)
+
+    shutil.copystat(src, dst)
+    return new_signatures, written
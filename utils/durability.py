@@ -0,0 +1,111 @@
+"""
+Durability
+Atomic temp-file writes and fsync policies for copied files
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import List, Set
+
+
+# Suffix of temp files that are renamed over the destination when complete
+TEMP_SUFFIX = ".autosync-tmp"
+
+# fsync policies
+FSYNC_FILE = "file"
+FSYNC_DIRECTORY = "directory"
+FSYNC_NEVER = "never"
+FSYNC_POLICIES = (FSYNC_FILE, FSYNC_DIRECTORY, FSYNC_NEVER)
+
+
+def temp_path(dst: Path) -> Path:
+    """Temp file a copy to dst is written to before the rename"""
+    return dst.with_name(dst.name + TEMP_SUFFIX)
+
+
+def fsync_file(path: Path):
+    """Flush a file's data and metadata to the device"""
+    # Windows only flushes handles opened for writing
+    flags = os.O_RDWR if os.name == "nt" else os.O_RDONLY
+    fd = os.open(path, flags | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_directory(path: Path):
+    """Flush a directory's entries (renames, new files) to the device"""
+    if os.name == "nt":
+        # Directory handles cannot be fsynced; NTFS journals renames itself
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class SyncBatch:
+    """
+    Deferred fsync of files written during a run
+
+    With the 'directory' policy files are renamed into place without an
+    fsync each and collected here. A flush syncs the collected files and
+    then every directory they live in once, so a directory of many small
+    files costs one directory sync instead of one per file, and by the
+    time of the flush most data has already been written back.
+    """
+
+    def __init__(self, max_files: int = 256):
+        """
+        Initialize batch
+
+        Args:
+            max_files: Pending files after which add() asks for a flush
+        """
+        self.max_files = max_files
+        self._files: List[Path] = []
+        self._lock = threading.Lock()
+
+    def add(self, path: Path) -> bool:
+        """
+        Collect a file written into place
+
+        Returns:
+            True when the batch is full and should be flushed
+        """
+        with self._lock:
+            self._files.append(path)
+            return len(self._files) >= self.max_files
+
+    def flush(self) -> int:
+        """
+        Sync the collected files, then their directories
+
+        Returns:
+            Number of paths that could not be synced
+        """
+        with self._lock:
+            files, self._files = self._files, []
+
+        failed = 0
+        directories: Set[Path] = set()
+        for path in files:
+            try:
+                fsync_file(path)
+            except FileNotFoundError:
+                # Replaced or removed since; nothing left to sync
+                continue
+            except OSError:
+                failed += 1
+                continue
+            directories.add(path.parent)
+
+        for directory in directories:
+            try:
+                fsync_directory(directory)
+            except OSError:
+                failed += 1
+        return failed
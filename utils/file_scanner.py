@@ -0,0 +1,290 @@
+"""
+File Scanner
+Single-pass os.scandir based directory walker, optionally multi-threaded
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+
+# Directories kept in flight per worker by a parallel scan
+SCAN_LOOKAHEAD = 4
+
+
+class ScanEntry:
+    """A file found by the scanner"""
+
+    __slots__ = ("path", "rel_path", "size", "mtime_ns", "ino")
+
+    def __init__(self, path: str, rel_path: str, size: int, mtime_ns: int, ino: int):
+        """
+        Initialize scan entry
+
+        Args:
+            path: Full path of the file
+            rel_path: Path relative to the scan root, with '/' separators
+            size: File size in bytes
+            mtime_ns: Modification time in nanoseconds
+            ino: Inode number (0 where the platform does not report it)
+        """
+        self.path = path
+        self.rel_path = rel_path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+
+    @property
+    def signature(self) -> tuple:
+        """(size, mtime_ns, inode) signature, as used by SyncManifest"""
+        return (self.size, self.mtime_ns, self.ino)
+
+    def __repr__(self) -> str:
+        return f"ScanEntry({self.rel_path!r}, size={self.size})"
+
+
+class DirectoryCache:
+    """
+    Per-directory cache of file metadata for repeated scans
+
+    For every directory scanned, the cache keeps the directory's mtime,
+    its entry count and the (size, mtime_ns, inode) of its files. Adding,
+    removing or renaming an entry changes the directory's mtime, so when
+    mtime and entry count still match, the cached file metadata is reused
+    and the files are not stat'ed again. Editing a file in place does not
+    touch its directory, so such edits are only seen by a scan that does
+    not trust the cache (see `trusted`). Lookups and stores are
+    thread-safe, for scans with several workers.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_file: Path):
+        """
+        Initialize cache
+
+        Args:
+            cache_file: Path of the JSON file backing this cache
+        """
+        self.cache_file = Path(cache_file)
+        self.runs = 0
+        self.trusted = True
+        self.hits = 0
+        self.misses = 0
+        self._dirs: Dict[str, list] = {}
+        self._seen: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_tree(cls, root: Path, cache_dir: Path) -> "DirectoryCache":
+        """Get the cache for a scan root"""
+        key = hashlib.sha1(str(Path(root).resolve()).encode("utf-8")).hexdigest()
+        return cls(Path(cache_dir) / f"{key}.json")
+
+    def load(self) -> bool:
+        """
+        Load cache from disk
+
+        Returns:
+            True if an existing cache was loaded
+        """
+        self._dirs = {}
+        self._seen = {}
+        self.hits = self.misses = 0
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != self.VERSION:
+            return False
+        self.runs = data.get("runs", 0)
+        self._dirs = data.get("dirs", {})
+        return True
+
+    def save(self) -> bool:
+        """Write the directories seen by the last scan to disk (atomic replace)"""
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": self.VERSION,
+                    "runs": self.runs + 1,
+                    "dirs": self._seen
+                }, f, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except OSError:
+            return False
+
+    def lookup(self, rel_dir: str, mtime_ns: int, count: int) -> Optional[Dict[str, List[int]]]:
+        """Cached file metadata of a directory, or None if it may have changed"""
+        cached = self._dirs.get(rel_dir)
+        with self._lock:
+            if self.trusted and cached is not None and cached[0] == mtime_ns and cached[1] == count:
+                self.hits += 1
+                return cached[2]
+            self.misses += 1
+        return None
+
+    def store(self, rel_dir: str, mtime_ns: int, count: int, files: Dict[str, List[int]]):
+        """Record the state of a scanned directory"""
+        with self._lock:
+            self._seen[rel_dir] = [mtime_ns, count, files]
+
+
+def _list_directory(dir_path: str, rel_dir: str, dir_mtime: int,
+                    file_filter: Optional[Callable[[str], bool]],
+                    dir_filter: Optional[Callable[[str], bool]],
+                    cache: Optional[DirectoryCache]) -> Tuple[List[ScanEntry], List[tuple], List[tuple]]:
+    """
+    List one directory and stat its matching files
+
+    Returns:
+        (files, subdirectories, errors): ScanEntry per matching file,
+        (path, rel_dir, mtime_ns) per directory to descend into and
+        (path, error) per entry that could not be read
+    """
+    files, subdirs, errors = [], [], []
+    try:
+        with os.scandir(dir_path) as it:
+            entries = list(it)
+    except OSError as e:
+        errors.append((dir_path, e))
+        return files, subdirs, errors
+
+    cached = None
+    metas = None
+    if cache is not None:
+        cached = cache.lookup(rel_dir, dir_mtime, len(entries))
+        metas = {}
+
+    for entry in entries:
+        rel_path = f"{rel_dir}{entry.name}"
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if dir_filter is None or dir_filter(rel_path):
+                    sub_mtime = entry.stat(follow_symlinks=False).st_mtime_ns if cache is not None else 0
+                    subdirs.append((entry.path, f"{rel_path}/", sub_mtime))
+                continue
+
+            if not entry.is_file():
+                continue
+
+            if file_filter is not None and not file_filter(rel_path):
+                continue
+
+            meta = cached.get(entry.name) if cached is not None else None
+            if meta is None:
+                st = entry.stat()
+                meta = [st.st_size, st.st_mtime_ns, st.st_ino]
+        except OSError as e:
+            errors.append((entry.path, e))
+            continue
+
+        if metas is not None:
+            metas[entry.name] = meta
+        files.append(ScanEntry(entry.path, rel_path, meta[0], meta[1], meta[2]))
+
+    if cache is not None:
+        cache.store(rel_dir, dir_mtime, len(entries), metas)
+    return files, subdirs, errors
+
+
+def scan_tree(root: Path,
+              file_filter: Optional[Callable[[str], bool]] = None,
+              dir_filter: Optional[Callable[[str], bool]] = None,
+              on_error: Optional[Callable[[str, OSError], None]] = None,
+              cache: Optional[DirectoryCache] = None,
+              workers: int = 1,
+              ordered: bool = True) -> Iterator[ScanEntry]:
+    """
+    Walk a directory tree once, yielding every regular file
+
+    Each directory is listed exactly once with os.scandir and the stat data
+    cached on the DirEntry is reused, so a file costs at most one stat call
+    (none on Windows, where scandir returns it for free). Directory symlinks
+    are not followed.
+
+    With several workers, directories are listed by a thread pool that
+    keeps up to SCAN_LOOKAHEAD directories per worker in flight, so on
+    network shares and slow USB hubs the per-directory round trips
+    overlap instead of adding up. Entries are still yielded as a stream.
+
+    Args:
+        root: Directory to scan
+        file_filter: Optional predicate on the relative path ('/' separated);
+            files for which it returns False are skipped
+        dir_filter: Optional predicate on a directory's relative path;
+            directories for which it returns False are not descended into
+        on_error: Optional callback for directories or files that cannot be read
+            (always called from the thread iterating the scan)
+        cache: Optional directory cache; files of directories whose mtime
+            and entry count are unchanged are not stat'ed
+        workers: Directories listed in parallel (1 = walk in this thread);
+            filters run in the worker threads
+        ordered: With several workers, yield files in the same order as a
+            single-threaded walk; if False, directories are yielded as
+            soon as they are listed
+
+    Yields:
+        ScanEntry for each matching file
+    """
+    root_mtime = 0
+    if cache is not None:
+        try:
+            root_mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            cache = None
+    stack = [(os.fspath(root), "", root_mtime)]
+
+    def list_directory(directory: tuple):
+        return _list_directory(*directory, file_filter, dir_filter, cache)
+
+    def emit(listing) -> Iterator[ScanEntry]:
+        files, subdirs, errors = listing
+        if on_error:
+            for path, error in errors:
+                on_error(path, error)
+        yield from files
+
+    if workers <= 1:
+        while stack:
+            listing = list_directory(stack.pop())
+            stack.extend(listing[1])
+            yield from emit(listing)
+        return
+
+    lookahead = workers * SCAN_LOOKAHEAD
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+    try:
+        if ordered:
+            # Depth-first like the single-threaded walk; the directories
+            # next in line (the top of the stack) are listed ahead
+            pending = [[directory, None] for directory in stack]
+            while pending:
+                for item in pending[-lookahead:]:
+                    if item[1] is None:
+                        item[1] = executor.submit(list_directory, item[0])
+                listing = pending.pop()[1].result()
+                pending.extend([directory, None] for directory in listing[1])
+                yield from emit(listing)
+        else:
+            in_flight = set()
+            while stack or in_flight:
+                while stack and len(in_flight) < lookahead:
+                    in_flight.add(executor.submit(list_directory, stack.pop()))
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    listing = future.result()
+                    stack.extend(listing[1])
+                    yield from emit(listing)
+    finally:
+        # Also reached when the caller stops iterating early
+        executor.shutdown(wait=False, cancel_futures=True)
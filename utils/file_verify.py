@@ -0,0 +1,123 @@
+"""
+File Verify
+Checksum verification of copied files in a process pool
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Worker processes only import this small module (and the utils package),
+# never the GUI
+from .verify_worker import XXHASH_AVAILABLE, BLAKE3_AVAILABLE, hash_pair
+
+
+# Hash algorithms; 'auto' picks the fastest one installed
+VERIFY_ALGORITHMS = ("auto", "xxh3_128", "blake3", "blake2b", "sha256")
+
+
+def resolve_algorithm(algorithm: str) -> str:
+    """
+    Map 'auto' to the fastest installed algorithm and check availability
+
+    Raises:
+        ValueError: If the algorithm is unknown
+        RuntimeError: If its package is not installed
+    """
+    if algorithm == "auto":
+        if XXHASH_AVAILABLE:
+            return "xxh3_128"
+        if BLAKE3_AVAILABLE:
+            return "blake3"
+        return "blake2b"
+    if algorithm not in VERIFY_ALGORITHMS:
+        raise ValueError(f"Unknown verify algorithm: {algorithm}")
+    if algorithm == "xxh3_128" and not XXHASH_AVAILABLE:
+        raise RuntimeError("xxhash not installed. Install with: pip install xxhash")
+    if algorithm == "blake3" and not BLAKE3_AVAILABLE:
+        raise RuntimeError("blake3 not installed. Install with: pip install blake3")
+    return algorithm
+
+
+class Verifier:
+    """
+    Compare copied files with their sources in a process pool
+
+    Files are submitted as soon as they are copied, so hashing on all
+    cores overlaps with the copies still running; results() then waits
+    for whatever is left. Each job hashes both files in the same worker;
+    the copy is flushed and evicted from the page cache first, so it is
+    read back from the device. Worker processes are started with 'spawn',
+    which is safe in a process that is already running threads; they run
+    utils.verify_worker, and main.py keeps its GUI imports inside main()
+    so re-importing it in a worker stays cheap.
+    """
+
+    def __init__(self, algorithm: str = "auto", workers: Optional[int] = None):
+        """
+        Initialize verifier
+
+        Args:
+            algorithm: One of VERIFY_ALGORITHMS
+            workers: Hashing processes (CPU count if None)
+        """
+        self.algorithm = resolve_algorithm(algorithm)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._pending: Dict[Future, Any] = {}
+        self._lock = threading.Lock()
+        self.verified_files = 0
+
+    def submit(self, key: Any, src: Path, dst: Path):
+        """
+        Queue a copied file for verification
+
+        Args:
+            key: Caller data returned with the result
+            src: Source file
+            dst: Copy to compare with the source
+        """
+        future = self._executor.submit(hash_pair, str(src), str(dst), self.algorithm)
+        with self._lock:
+            self._pending[future] = key
+
+    def results(self) -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+        """
+        Wait for queued verifications
+
+        Yields:
+            (key, error, digest) per file as it finishes; error is None
+            when the copy matches its source, digest is the hex digest of
+            the source (None if it could not be hashed)
+        """
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                with self._lock:
+                    key = self._pending.pop(future)
+                try:
+                    src_digest, dst_digest = future.result()
+                except Exception as e:
+                    # Unreadable file, or a worker process that died
+                    yield key, str(e) or type(e).__name__, None
+                    continue
+                if src_digest != dst_digest:
+                    yield key, "checksum mismatch", src_digest
+                    continue
+                self.verified_files += 1
+                yield key, None, src_digest
+
+    def shutdown(self):
+        """Stop the worker processes, dropping verifications not started"""
+        with self._lock:
+            self._pending.clear()
+        self._executor.shutdown(cancel_futures=True)
@@ -0,0 +1,146 @@
+"""
+File Watcher
+Debounced filesystem change collection built on watchdog
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+    # Define dummy classes for type hints
+    Observer = None
+    FileSystemEventHandler = object
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """Forwards watchdog events to the owning FileWatcher"""
+
+    def __init__(self, watcher: "FileWatcher"):
+        super().__init__()
+        self._watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        # A directory is "modified" whenever an entry in it changes; that
+        # entry has its own event, and reporting the directory as well
+        # would make the caller copy all of it again
+        if event.is_directory and event.event_type == "modified":
+            return
+        self._watcher._add(event.src_path)
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self._watcher._add(dest_path)
+
+
+class FileWatcher:
+    """
+    Collect changed paths under a directory
+
+    Events are coalesced into a set of relative paths ('/' separated). A
+    path may name a file or a directory and may no longer exist; callers
+    look at the source to decide what to do. Directories are only reported
+    when they were created, moved or deleted, never because an entry in
+    them changed. When more than max_pending
+    distinct paths pile up, the watcher reports an overflow instead and
+    the caller should fall back to a full rescan.
+    """
+
+    def __init__(self, root: Path, max_pending: int = 10000):
+        """
+        Initialize watcher
+
+        Args:
+            root: Directory to watch (recursively)
+            max_pending: Pending path limit before reporting an overflow
+        """
+        self.root = os.path.abspath(os.fspath(root))
+        self.max_pending = max_pending
+        self._pending: Set[str] = set()
+        self._overflow = False
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._condition = threading.Condition()
+        self._observer: Optional[Observer] = None
+
+    def start(self):
+        """Start watching"""
+        if not WATCHDOG_AVAILABLE:
+            raise RuntimeError("watchdog not installed. Install with: pip install watchdog")
+
+        self._observer = Observer()
+        self._observer.schedule(_ChangeHandler(self), self.root, recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def stop(self):
+        """Stop watching"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+
+    def is_alive(self) -> bool:
+        """Check if the observer thread is still running"""
+        return self._observer is not None and self._observer.is_alive()
+
+    def _add(self, path):
+        """Record a changed absolute path"""
+        if isinstance(path, bytes):
+            path = os.fsdecode(path)
+        rel_path = os.path.relpath(path, self.root)
+        if rel_path == "." or rel_path.startswith(".."):
+            return
+        rel_path = rel_path.replace(os.sep, "/")
+
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending and not self._overflow:
+                self._first_event = now
+            if not self._overflow:
+                self._pending.add(rel_path)
+                if len(self._pending) > self.max_pending:
+                    self._overflow = True
+                    self._pending.clear()
+            self._last_event = now
+            self._condition.notify_all()
+
+    def collect(self, debounce: float = 0.5, timeout: float = 0.5) -> Tuple[Set[str], bool]:
+        """
+        Wait for a quiet batch of changes
+
+        Returns once no new event arrived for `debounce` seconds (at most
+        10 x debounce after the first event of the batch, so a constant
+        stream of events cannot starve the sync), or after `timeout`
+        seconds without any pending change.
+
+        Returns:
+            Tuple of (changed relative paths, overflow flag)
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                has_changes = self._pending or self._overflow
+                if has_changes:
+                    quiet_for = now - self._last_event
+                    if quiet_for >= debounce or now - self._first_event >= debounce * 10:
+                        break
+                    self._condition.wait(debounce - quiet_for)
+                else:
+                    if now >= deadline:
+                        break
+                    self._condition.wait(deadline - now)
+
+            changes, overflow = self._pending, self._overflow
+            self._pending = set()
+            self._overflow = False
+            return changes, overflow
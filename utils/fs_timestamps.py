@@ -0,0 +1,203 @@
+"""
+Filesystem Timestamps
+Filesystem detection and mtime comparison rules for coarse-grained media
+"""
+
+import os
+import re
+from typing import Optional, Tuple
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+    psutil = None
+
+
+_SECOND_NS = 1_000_000_000
+HOUR_NS = 3600 * _SECOND_NS
+
+# Modification time resolution of filesystems that do not store nanoseconds.
+# exFAT has an optional 10 ms field, but not every driver writes it, so it
+# gets the same 2 s as FAT.
+MTIME_RESOLUTION_NS = {
+    "vfat": 2 * _SECOND_NS,
+    "msdos": 2 * _SECOND_NS,
+    "fat": 2 * _SECOND_NS,
+    "fat12": 2 * _SECOND_NS,
+    "fat16": 2 * _SECOND_NS,
+    "fat32": 2 * _SECOND_NS,
+    "exfat": 2 * _SECOND_NS,
+    "hfs": _SECOND_NS,
+    "hfsplus": _SECOND_NS,
+    "ntfs": 100,
+    "ntfs3": 100,
+}
+
+# Filesystems that store local time (shifted by an hour across DST changes)
+# and have no stable inode numbers
+FAT_FILESYSTEMS = frozenset(("vfat", "msdos", "fat", "fat12", "fat16", "fat32", "exfat"))
+
+
+def _existing(path: str) -> str:
+    """Nearest existing path at or above path"""
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.path.realpath(path)
+
+
+def _longest_mount(path: str, mounts) -> Tuple[str, str, str]:
+    """Longest mount containing path, from (device, mountpoint, type) tuples"""
+    best = ("", "", "")
+    path = os.path.normcase(path)
+    for device, mountpoint, fs_type in mounts:
+        normalized = os.path.normcase(mountpoint)
+        prefix = normalized if normalized.endswith(os.sep) else normalized + os.sep
+        if (path == normalized or path.startswith(prefix)) and len(mountpoint) > len(best[1]):
+            best = (device, mountpoint, fs_type)
+    return best
+
+
+def _proc_mounts():
+    """(device, mountpoint, type) tuples from /proc/mounts"""
+    unescape = lambda s: re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), s)
+    with open("/proc/mounts", "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 3:
+                yield unescape(fields[0]), unescape(fields[1]), fields[2]
+
+
+def mount_point(path: str) -> Tuple[str, str, str]:
+    """
+    Find the mount holding a path (psutil, else /proc/mounts)
+
+    Returns:
+        (device, mountpoint, filesystem type), empty strings if unknown
+    """
+    path = _existing(str(path))
+    try:
+        if PSUTIL_AVAILABLE:
+            return _longest_mount(path, ((p.device, p.mountpoint, p.fstype)
+                                         for p in psutil.disk_partitions(all=True)))
+        if os.path.exists("/proc/mounts"):
+            return _longest_mount(path, _proc_mounts())
+    except (OSError, AttributeError):
+        pass
+    return "", "", ""
+
+
+def _windows_volume_type(path: str) -> str:
+    """Filesystem name of the volume holding path (Windows)"""
+    import ctypes
+    kernel32 = ctypes.windll.kernel32
+    root = ctypes.create_unicode_buffer(261)
+    if not kernel32.GetVolumePathNameW(path, root, len(root)):
+        return ""
+    name = ctypes.create_unicode_buffer(261)
+    if not kernel32.GetVolumeInformationW(root, None, 0, None, None, None, name, len(name)):
+        return ""
+    return name.value
+
+
+def filesystem_type(path: str) -> str:
+    """
+    Detect the filesystem holding a path
+
+    Uses psutil when installed, else /proc/mounts on Linux or the volume
+    information on Windows.
+
+    Returns:
+        Lowercase type name ('ext4', 'vfat', 'exfat', 'ntfs', ...), or ''
+        if it cannot be determined
+    """
+    if os.name == "nt" and not PSUTIL_AVAILABLE:
+        try:
+            return _windows_volume_type(_existing(str(path))).lower()
+        except (OSError, AttributeError):
+            return ""
+    return mount_point(path)[2].lower()
+
+
+class TimestampRules:
+    """
+    How modification times of files on given filesystems are compared
+
+    FAT and exFAT keep mtimes in 2 second steps, so a copy's mtime is the
+    source's rounded; they also store local time, so after a DST change
+    (or on a machine in another zone) every mtime reads exactly an hour off,
+    and their inode numbers are not stable across mounts. Comparing with
+    the right tolerance keeps incremental runs to such media incremental.
+    """
+
+    def __init__(self, tolerance_ns: int = 0, hour_shift: bool = False,
+                 ignore_inode: bool = False, fs_type: str = ""):
+        """
+        Initialize rules
+
+        Args:
+            tolerance_ns: Largest mtime difference still counted as equal
+            hour_shift: Also accept mtimes exactly one hour apart (DST)
+            ignore_inode: Do not compare inode numbers
+            fs_type: Filesystem the rules were derived from (for logging)
+        """
+        self.tolerance_ns = tolerance_ns
+        self.hour_shift = hour_shift
+        self.ignore_inode = ignore_inode
+        self.fs_type = fs_type
+        self.exact = not (tolerance_ns or hour_shift or ignore_inode)
+
+    @classmethod
+    def for_path(cls, path: str, tolerance_ms: Optional[float] = None) -> "TimestampRules":
+        """
+        Rules for files on the filesystem holding path
+
+        Args:
+            path: File or directory (need not exist yet)
+            tolerance_ms: Explicit mtime tolerance overriding the detected one
+        """
+        fs_type = filesystem_type(path)
+        tolerance = MTIME_RESOLUTION_NS.get(fs_type, 0)
+        if tolerance_ms is not None:
+            tolerance = int(tolerance_ms * 1_000_000)
+        fat = fs_type in FAT_FILESYSTEMS
+        return cls(tolerance, hour_shift=fat, ignore_inode=fat, fs_type=fs_type)
+
+    def combine(self, other: "TimestampRules") -> "TimestampRules":
+        """Rules for comparing a file on this filesystem with one on other's"""
+        if other.exact:
+            return self
+        if self.exact:
+            return other
+        return TimestampRules(max(self.tolerance_ns, other.tolerance_ns),
+                              self.hour_shift or other.hour_shift,
+                              self.ignore_inode or other.ignore_inode,
+                              self.fs_type or other.fs_type)
+
+    def mtime_matches(self, a_ns: int, b_ns: int) -> bool:
+        """Check if two mtimes are equal under these rules"""
+        diff = abs(a_ns - b_ns)
+        if diff <= self.tolerance_ns:
+            return True
+        return self.hour_shift and abs(diff - HOUR_NS) <= self.tolerance_ns
+
+    def same_file(self, size_a: int, mtime_a: int, size_b: int, mtime_b: int) -> bool:
+        """Check if two files have the same size and mtime under these rules"""
+        return size_a == size_b and (mtime_a == mtime_b or self.mtime_matches(mtime_a, mtime_b))
+
+    def signature_matches(self, recorded: Tuple[int, int, int], current: Tuple[int, int, int]) -> bool:
+        """Check if a (size, mtime_ns, inode) signature still matches a recorded one"""
+        if self.exact:
+            return recorded == current
+        if not self.ignore_inode and recorded[2] != current[2]:
+            return False
+        return self.same_file(recorded[0], recorded[1], current[0], current[1])
+
+
+# Rules for filesystems with exact timestamps and stable inodes
+EXACT_RULES = TimestampRules()
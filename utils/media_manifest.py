@@ -0,0 +1,211 @@
+"""
+Media Manifest
+Destination tree listing stored on the destination volume itself
+"""
+
+import gzip
+import json
+import os
+import random
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .file_scanner import ScanEntry
+from .fs_timestamps import TimestampRules, mount_point
+from .sync_manifest import FileSignature
+
+
+# Directory at the destination root holding the manifest; never scanned
+MEDIA_DIR = ".autosync"
+MEDIA_MANIFEST_NAME = "manifest.json.gz"
+
+# Files stat'ed by the consistency check
+CHECK_SAMPLE = 16
+
+
+def _windows_volume_identity(path: str) -> Dict[str, str]:
+    """Serial number and label of the volume holding path (Windows)"""
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.windll.kernel32
+    root = ctypes.create_unicode_buffer(261)
+    if not kernel32.GetVolumePathNameW(path, root, len(root)):
+        return {}
+    label = ctypes.create_unicode_buffer(261)
+    serial = wintypes.DWORD()
+    if not kernel32.GetVolumeInformationW(root, label, len(label), ctypes.byref(serial),
+                                          None, None, None, 0):
+        return {}
+    return {"uuid": f"{serial.value:08X}", "label": label.value}
+
+
+def _linux_volume_identity(path: str) -> Dict[str, str]:
+    """UUID and label of the block device mounted at path (udev links)"""
+    device = mount_point(path)[0]
+    if not device.startswith("/dev/"):
+        return {}
+    device = os.path.realpath(device)
+    identity = {}
+    for key, directory in (("uuid", "/dev/disk/by-uuid"), ("label", "/dev/disk/by-label")):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if os.path.realpath(os.path.join(directory, name)) == device:
+                # udev escapes spaces and other special characters as \xNN
+                identity[key] = name.encode("latin-1").decode("unicode_escape")
+                break
+    return identity
+
+
+def volume_identity(path: Path) -> Dict[str, str]:
+    """
+    Identify the volume holding a path independently of where it is mounted
+
+    Returns:
+        Dict with 'uuid' (volume UUID or serial number) and/or 'label';
+        empty if the volume cannot be identified
+    """
+    try:
+        if os.name == "nt":
+            return _windows_volume_identity(os.path.abspath(path))
+        return _linux_volume_identity(str(path))
+    except (OSError, AttributeError, UnicodeError):
+        return {}
+
+
+def same_volume(recorded: Dict[str, str], current: Dict[str, str]) -> bool:
+    """Check if two volume identities can be the same volume (True if unknown)"""
+    for key in ("uuid", "label"):
+        if recorded.get(key) and current.get(key):
+            return recorded[key] == current[key]
+    return True
+
+
+class MediaManifest:
+    """
+    Listing of a destination tree kept on the destination volume
+
+    Walking a USB stick costs a random metadata read per file and
+    directory. After each run the task writes what the destination holds
+    (relative path, size, mtime) into one compressed file at the
+    destination root, together with the volume's identity and the root
+    directory's mtime. A later run, on this machine or another, can read
+    that one file instead of walking the tree once check() agrees it
+    still describes the volume.
+    """
+
+    VERSION = 1
+
+    def __init__(self, root: Path):
+        """
+        Initialize media manifest
+
+        Args:
+            root: Destination root directory
+        """
+        self.root = Path(root)
+        self.manifest_file = self.root / MEDIA_DIR / MEDIA_MANIFEST_NAME
+        self.volume: Dict[str, str] = {}
+        self.root_mtime_ns: Optional[int] = None
+        self.entries: Dict[str, List[int]] = {}
+
+    def load(self) -> bool:
+        """
+        Load the manifest from the destination
+
+        Returns:
+            True if a manifest was loaded
+        """
+        self.entries = {}
+        try:
+            with gzip.open(self.manifest_file, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return False
+
+        if data.get("version") != self.VERSION:
+            return False
+        self.volume = data.get("volume", {})
+        self.root_mtime_ns = data.get("root_mtime_ns")
+        self.entries = data.get("entries", {})
+        return True
+
+    def save(self, entries: Dict[str, Iterable[int]]) -> bool:
+        """
+        Write the manifest onto the destination (atomic replace)
+
+        Args:
+            entries: Relative path -> (size, mtime_ns, ...) of every file
+        """
+        directory = self.manifest_file.parent
+        try:
+            directory.mkdir(exist_ok=True)
+            # Stat the root after creating MEDIA_DIR; writing inside it
+            # does not change the root's mtime
+            self.root_mtime_ns = os.stat(self.root).st_mtime_ns
+            self.volume = volume_identity(self.root)
+            self.entries = {rel: list(sig)[:2] for rel, sig in entries.items()}
+            tmp_file = directory / (MEDIA_MANIFEST_NAME + ".tmp")
+            with gzip.open(tmp_file, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump({
+                    "version": self.VERSION,
+                    "volume": self.volume,
+                    "root_mtime_ns": self.root_mtime_ns,
+                    "entries": self.entries
+                }, f, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp_file, self.manifest_file)
+            return True
+        except OSError:
+            return False
+
+    def invalidate(self):
+        """Remove the manifest before the destination is modified"""
+        try:
+            self.manifest_file.unlink()
+        except OSError:
+            pass
+
+    def check(self, rules: TimestampRules, sample: int = CHECK_SAMPLE) -> Optional[str]:
+        """
+        Cheap check that the manifest still describes the destination
+
+        Compares the volume identity and the root directory's mtime, and
+        stats a random sample of the listed files.
+
+        Args:
+            rules: Timestamp rules of the destination filesystem
+
+        Returns:
+            Why the manifest cannot be trusted, or None if it can
+        """
+        if not same_volume(self.volume, volume_identity(self.root)):
+            return "written on a different volume"
+        try:
+            root_mtime = os.stat(self.root).st_mtime_ns
+        except OSError as e:
+            return str(e)
+        if self.root_mtime_ns is None or not rules.mtime_matches(root_mtime, self.root_mtime_ns):
+            return "destination folder changed since it was written"
+
+        for rel_path in random.sample(list(self.entries), min(sample, len(self.entries))):
+            size, mtime_ns = self.entries[rel_path]
+            try:
+                st = os.stat(self.root / rel_path)
+            except OSError:
+                return f"{rel_path} is missing"
+            if not rules.same_file(st.st_size, st.st_mtime_ns, size, mtime_ns):
+                return f"{rel_path} changed"
+        return None
+
+    def signature(self, rel_path: str) -> Optional[FileSignature]:
+        """Listed (size, mtime_ns, 0) signature of a file, None if not listed"""
+        entry = self.entries.get(rel_path)
+        return None if entry is None else (entry[0], entry[1], 0)
+
+    def scan_entries(self) -> List[ScanEntry]:
+        """The listed files as scan entries (inode unknown)"""
+        root = str(self.root)
+        return [ScanEntry(os.path.join(root, rel_path), rel_path, size, mtime_ns, 0)
+                for rel_path, (size, mtime_ns) in self.entries.items()]
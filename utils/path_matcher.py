@@ -0,0 +1,209 @@
+"""
+Path Matcher
+Precompiled include/exclude pattern matching with gitignore-like semantics
+"""
+
+import os
+import re
+from typing import List, Optional, Tuple
+
+
+def _translate_segment(segment: str) -> str:
+    """Translate one glob path segment (no '/') to a regex"""
+    out = []
+    i = 0
+    n = len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == "*":
+            while i < n and segment[i] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and segment[j] in "!^":
+                j += 1
+            if j < n and segment[j] == "]":
+                j += 1
+            while j < n and segment[j] != "]":
+                j += 1
+            if j >= n:
+                out.append("\\[")
+            else:
+                body = segment[i:j].replace("\\", "\\\\")
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = j + 1
+        elif c == "\\" and i < n:
+            out.append(re.escape(segment[i]))
+            i += 1
+        else:
+            out.append(re.escape(c))
+    return "".join(out)
+
+
+def translate_pattern(pattern: str) -> Tuple[str, bool, bool]:
+    """
+    Translate a gitignore-style pattern to a regex over '/' separated paths
+
+    - '!' prefix negates the pattern
+    - trailing '/' matches directories only
+    - a pattern without '/' matches the name at any depth, otherwise it is
+      anchored to the root (a leading '/' only anchors)
+    - '**' matches any number of directories
+
+    Returns:
+        Tuple of (regex, negated, dir_only); the regex matches the whole path
+    """
+    negated = False
+    if pattern.startswith("!"):
+        negated = True
+        pattern = pattern[1:]
+    elif pattern.startswith("\\!"):
+        pattern = pattern[1:]
+
+    pattern = pattern.replace("\\", "/") if os.sep == "\\" else pattern
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts = pattern.split("/")
+    body = []
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        if part == "**":
+            body.append(".*" if last else "(?:.*/)?")
+        else:
+            body.append(_translate_segment(part))
+            if not last:
+                body.append("/")
+
+    regex = "".join(body)
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex, negated, dir_only
+
+
+class _RuleSet:
+    """Ordered rules where the last matching rule wins"""
+
+    def __init__(self, rules: List[Tuple[str, bool]]):
+        """
+        Initialize rule set
+
+        Args:
+            rules: List of (regex, negated) in pattern order
+        """
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        self.empty = not rules
+        self._combined = None
+        self._rules = []
+
+        if rules and not any(negated for _, negated in rules):
+            # No negation: one regex answers for all patterns
+            combined = "|".join(f"(?:{regex})" for regex, _ in rules)
+            self._combined = re.compile(f"(?:{combined})\\Z", flags)
+        else:
+            self._rules = [(re.compile(regex + r"\Z", flags), negated) for regex, negated in reversed(rules)]
+
+    def match(self, path: str) -> Optional[bool]:
+        """
+        Match a path
+
+        Returns:
+            True if the deciding rule is positive, False if it is negated,
+            None if no rule matched
+        """
+        if self._combined is not None:
+            return True if self._combined.match(path) else None
+        for regex, negated in self._rules:
+            if regex.match(path):
+                return not negated
+        return None
+
+
+class PathMatcher:
+    """
+    Compiled include/exclude matcher for relative paths
+
+    Patterns are compiled once; each check is a single regex call in the
+    common case without negations. Paths are relative to the transfer root
+    and use '/' separators.
+
+    Exclude patterns follow .gitignore rules: an excluded directory is
+    excluded with everything below it (so walkers can prune it), and a
+    later '!' pattern re-includes what an earlier one excluded. Include
+    patterns use the same syntax; a file is included when the last include
+    pattern matching it (or one of its directories) is not negated.
+    """
+
+    def __init__(self, include_patterns: Optional[List[str]] = None,
+                 exclude_patterns: Optional[List[str]] = None):
+        """
+        Initialize matcher
+
+        Args:
+            include_patterns: Patterns a file must match (empty = all files)
+            exclude_patterns: Patterns for files and directories to skip
+        """
+        include_rules = []
+        for pattern in include_patterns or []:
+            regex, negated, dir_only = translate_pattern(pattern)
+            # A pattern naming a directory includes everything inside it
+            suffix = "/.*" if dir_only else "(?:/.*)?"
+            include_rules.append((regex + suffix, negated))
+
+        exclude_dir_rules = []
+        exclude_file_rules = []
+        for pattern in exclude_patterns or []:
+            regex, negated, dir_only = translate_pattern(pattern)
+            exclude_dir_rules.append((regex, negated))
+            if not dir_only:
+                exclude_file_rules.append((regex, negated))
+
+        self._include = _RuleSet(include_rules)
+        self._exclude_dirs = _RuleSet(exclude_dir_rules)
+        self._exclude_files = _RuleSet(exclude_file_rules)
+
+    def dir_excluded(self, rel_dir: str) -> bool:
+        """Check if a directory (and its whole subtree) is excluded"""
+        if self._exclude_dirs.empty:
+            return False
+        return self._exclude_dirs.match(rel_dir) is True
+
+    def file_included(self, rel_path: str) -> bool:
+        """
+        Check if a file is selected, assuming its directories are not excluded
+
+        This is the per-file check for walkers that already prune excluded
+        directories with dir_excluded().
+        """
+        if not self._exclude_files.empty and self._exclude_files.match(rel_path) is True:
+            return False
+        if self._include.empty:
+            return True
+        return self._include.match(rel_path) is True
+
+    def dir_pruned(self, rel_dir: str) -> bool:
+        """Check if a directory or any of its parents is excluded"""
+        if self._exclude_dirs.empty or not rel_dir:
+            return False
+        parts = rel_dir.split("/")
+        for i in range(1, len(parts) + 1):
+            if self.dir_excluded("/".join(parts[:i])):
+                return True
+        return False
+
+    def matches(self, rel_path: str) -> bool:
+        """Check if a file is selected, including exclusion of its directories"""
+        parent, _, _ = rel_path.rpartition("/")
+        if self.dir_pruned(parent):
+            return False
+        return self.file_included(rel_path)
@@ -0,0 +1,96 @@
+"""
+Snapshots
+Naming, listing and retention of timestamped snapshot directories
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+
+SNAPSHOT_FORMAT = "%Y-%m-%d_%H%M%S"
+
+# Suffix of a snapshot directory that is still being written
+SNAPSHOT_PARTIAL_SUFFIX = ".partial"
+
+
+def snapshot_name(when: datetime) -> str:
+    """Directory name of a snapshot taken at `when`"""
+    return when.strftime(SNAPSHOT_FORMAT)
+
+
+def list_snapshots(root: Path) -> List[Tuple[datetime, Path]]:
+    """
+    List complete snapshots under a destination root
+
+    Directories whose name is not a snapshot timestamp (including
+    partial snapshots) are ignored.
+
+    Returns:
+        (timestamp, path) tuples, oldest first
+    """
+    snapshots = []
+    try:
+        children = list(Path(root).iterdir())
+    except OSError:
+        return []
+
+    for child in children:
+        try:
+            when = datetime.strptime(child.name, SNAPSHOT_FORMAT)
+        except ValueError:
+            continue
+        if child.is_dir() and not child.is_symlink():
+            snapshots.append((when, child))
+
+    snapshots.sort()
+    return snapshots
+
+
+def list_partial_snapshots(root: Path) -> List[Path]:
+    """List snapshot directories left behind by interrupted runs, oldest first"""
+    try:
+        return sorted(p for p in Path(root).iterdir()
+                      if p.name.endswith(SNAPSHOT_PARTIAL_SUFFIX) and p.is_dir())
+    except OSError:
+        return []
+
+
+def expired_snapshots(snapshots: List[Tuple[datetime, Path]],
+                      keep_daily: int, keep_weekly: int, keep_last: int = 1) -> List[Path]:
+    """
+    Apply daily/weekly retention to a list of snapshots
+
+    The newest snapshot of each of the last `keep_daily` days that have
+    snapshots is kept, as is the newest snapshot of each of the last
+    `keep_weekly` ISO weeks, plus the `keep_last` most recent snapshots
+    (at least one). With both daily and weekly limits at 0 nothing expires.
+
+    Args:
+        snapshots: (timestamp, path) tuples as returned by list_snapshots
+        keep_daily: Number of days to keep
+        keep_weekly: Number of weeks to keep
+        keep_last: Number of most recent snapshots always kept
+
+    Returns:
+        Paths of snapshots to delete
+    """
+    if not snapshots or (keep_daily <= 0 and keep_weekly <= 0):
+        return []
+
+    newest_first = sorted(snapshots, reverse=True)
+    keep = {path for _, path in newest_first[:max(1, keep_last)]}
+
+    for limit, period in ((keep_daily, lambda when: when.date()),
+                          (keep_weekly, lambda when: when.isocalendar()[:2])):
+        seen = set()
+        for when, path in newest_first:
+            key = period(when)
+            if key in seen:
+                continue
+            if len(seen) >= limit:
+                break
+            seen.add(key)
+            keep.add(path)
+
+    return [path for _, path in snapshots if path not in keep]
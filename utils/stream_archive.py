@@ -0,0 +1,279 @@
+"""
+Stream Archive
+Seekable tar archives compressed in parallel, independent blocks
+"""
+
+import gzip
+import json
+import os
+import tarfile
+import zlib
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+
+# Uncompressed tar bytes per independently compressed block
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+
+# Compression formats and their archive extensions
+ARCHIVE_EXTENSIONS = {
+    "zstd": ".tar.zst",
+    "gzip": ".tar.gz",
+    "none": ".tar",
+}
+
+INDEX_SUFFIX = ".index.json"
+
+
+def index_path(archive_path: Path) -> Path:
+    """Sidecar index file of an archive"""
+    archive_path = Path(archive_path)
+    return archive_path.with_name(archive_path.name + INDEX_SUFFIX)
+
+
+def _compress(compression: str, data: bytes, level: Optional[int]) -> bytes:
+    """Compress one block into a self-contained gzip member or zstd frame"""
+    if compression == "gzip":
+        return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+    if compression == "zstd":
+        # Compressor objects are not thread safe, so each block gets its own
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(data)
+    return data
+
+
+def _decompress(compression: str, data: bytes) -> bytes:
+    """Decompress one block"""
+    if compression == "gzip":
+        return zlib.decompress(data, wbits=31)
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+class _BlockSink:
+    """File-like object tarfile writes into; cuts the stream into blocks"""
+
+    def __init__(self, writer: "StreamArchiveWriter"):
+        self._writer = writer
+        self.position = 0
+
+    def write(self, data) -> int:
+        self._writer._feed(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+
+class _ReadWatcher:
+    """Wraps a source file so every read can report progress or abort"""
+
+    def __init__(self, fobj: BinaryIO, on_read: Callable[[int], None]):
+        self._fobj = fobj
+        self._on_read = on_read
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fobj.read(size)
+        self._on_read(len(data))
+        return data
+
+
+class StreamArchiveWriter:
+    """
+    Write files into a tar stream compressed as independent blocks
+
+    The tar stream is cut into fixed-size blocks that a thread pool
+    compresses in parallel (zlib and zstd release the GIL). Each block
+    becomes a complete gzip member or zstd frame, and concatenated members
+    are a valid .tar.gz / .tar.zst that standard tools extract. Only a
+    bounded number of blocks is in flight, so memory stays around
+    block_size x 2 x threads regardless of the archive size.
+
+    The writer records where every block starts in the compressed and in
+    the tar stream, and where each file's data starts in the tar stream.
+    With that index one file can be extracted by decompressing only the
+    blocks that hold it (see extract_file).
+    """
+
+    def __init__(self, archive_path: Path, compression: str = "gzip",
+                 level: Optional[int] = None, threads: int = 4,
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize writer
+
+        Args:
+            archive_path: Archive file to create
+            compression: 'zstd', 'gzip' or 'none'
+            level: Compression level (format default if None)
+            threads: Compression threads
+            block_size: Uncompressed bytes per block
+        """
+        if compression not in ARCHIVE_EXTENSIONS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard not installed. Install with: pip install zstandard")
+
+        self.compression = compression
+        self.level = level
+        self.block_size = block_size
+        self._out = open(archive_path, 'wb')
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads),
+                                            thread_name_prefix="archive")
+        self._max_pending = max(1, threads) * 2
+        self._pending = deque()
+        self._buffer = bytearray()
+        self._submitted = 0
+        self._compressed = 0
+        self.blocks = []
+        self.files: Dict[str, list] = {}
+        self._sink = _BlockSink(self)
+        self._tar = tarfile.open(fileobj=self._sink, mode='w', format=tarfile.PAX_FORMAT)
+
+    def add_file(self, fobj: BinaryIO, arcname: str,
+                 on_read: Optional[Callable[[int], None]] = None):
+        """
+        Append a regular file to the archive
+
+        The caller opens the file, so a file that cannot be opened can be
+        skipped before anything of it is written.
+
+        Args:
+            fobj: The file, opened in binary mode
+            arcname: Name inside the archive ('/' separated)
+            on_read: Called with the byte count of every read from the file;
+                may raise to abort the archive
+
+        Raises:
+            OSError: If the file cannot be read (the archive is unusable)
+        """
+        info = self._tar.gettarinfo(arcname=arcname, fileobj=fobj)
+        source = _ReadWatcher(fobj, on_read) if on_read else fobj
+        self._tar.addfile(info, source)
+
+        # Data is followed by padding to the next 512 byte record
+        padded = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        self.files[arcname] = [self._sink.position - padded, info.size, int(info.mtime)]
+
+    def _feed(self, data):
+        """Buffer tar output and hand full blocks to the compressors"""
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+
+    def _submit(self, block: bytes):
+        """Compress a block in the pool, writing finished blocks in order"""
+        future = self._executor.submit(_compress, self.compression, block, self.level)
+        self._pending.append((self._submitted, future))
+        self._submitted += len(block)
+        self._drain(self._max_pending - 1)
+
+    def _drain(self, keep: int):
+        """Write compressed blocks until at most `keep` are in flight"""
+        while len(self._pending) > keep:
+            offset, future = self._pending.popleft()
+            data = future.result()
+            self.blocks.append([self._compressed, offset])
+            self._out.write(data)
+            self._compressed += len(data)
+
+    def close(self) -> Dict[str, Any]:
+        """
+        Finish the archive
+
+        Returns:
+            Index of the archive (see save_index)
+        """
+        self._tar.close()
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer = bytearray()
+        self._drain(0)
+        self._executor.shutdown()
+        self._out.flush()
+        self._out.close()
+        return {
+            "version": 1,
+            "compression": self.compression,
+            "compressed_size": self._compressed,
+            "blocks": self.blocks,
+            "files": self.files
+        }
+
+    def abort(self):
+        """Abandon the archive (the caller removes the file)"""
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(cancel_futures=True)
+        self._out.close()
+
+
+def save_index(path: Path, index: Dict[str, Any]):
+    """Write an archive index (atomic replace)"""
+    path = Path(path)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+
+def load_index(path: Path) -> Dict[str, Any]:
+    """Read an archive index"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def extract_file(archive_path: Path, arcname: str, output: BinaryIO,
+                 index: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Extract one file without reading the whole archive
+
+    Only the compressed blocks holding the file's data are read and
+    decompressed.
+
+    Args:
+        archive_path: Archive written by StreamArchiveWriter
+        arcname: Name of the file inside the archive
+        output: Binary stream the file's data is written to
+        index: Archive index (loaded from the sidecar file if None)
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        KeyError: If the archive has no such file
+    """
+    if index is None:
+        index = load_index(index_path(archive_path))
+
+    data_offset, size, _ = index["files"][arcname]
+    blocks = index["blocks"]
+    block = max(0, bisect_right([b[1] for b in blocks], data_offset) - 1)
+
+    skip = data_offset - blocks[block][1] if blocks else 0
+    remaining = size
+    with open(archive_path, 'rb') as f:
+        while remaining > 0 and block < len(blocks):
+            start = blocks[block][0]
+            end = blocks[block + 1][0] if block + 1 < len(blocks) else index["compressed_size"]
+            f.seek(start)
+            data = _decompress(index["compression"], f.read(end - start))
+            piece = data[skip:skip + remaining]
+            output.write(piece)
+            remaining -= len(piece)
+            skip = 0
+            block += 1
+
+    return size - remaining
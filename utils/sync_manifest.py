@@ -0,0 +1,159 @@
+"""
+Sync Manifest
+Persisted per-task record of file metadata used for incremental transfers
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# (size, mtime_ns, inode)
+FileSignature = Tuple[int, int, int]
+
+DEFAULT_MANIFEST_DIR = "configs/manifests"
+
+
+def stat_signature(st: os.stat_result) -> FileSignature:
+    """Build a file signature from a stat result"""
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def transfer_key(source: Path, destination: Path) -> str:
+    """
+    Stable key for a source/destination pair
+
+    Derived from both resolved paths so the same pair maps to the same
+    state files across restarts, independent of the task id.
+    """
+    source_str = str(Path(source).resolve())
+    destination_str = str(Path(destination).resolve())
+    return hashlib.sha1(f"{source_str}|{destination_str}".encode("utf-8")).hexdigest()
+
+
+class SyncManifest:
+    """
+    Manifest of source/destination signatures for one transfer pair
+
+    Each entry maps a relative path (POSIX separators) to the signature the
+    source had and the signature the destination got when the file was last
+    synced. A source whose current signature matches the recorded one is
+    unchanged and does not need to be copied again.
+    """
+
+    VERSION = 1
+
+    def __init__(self, manifest_file: Path, source: str = "", destination: str = ""):
+        """
+        Initialize manifest
+
+        Args:
+            manifest_file: Path of the JSON file backing this manifest
+            source: Source root the manifest describes
+            destination: Destination root the manifest describes
+        """
+        self.manifest_file = Path(manifest_file)
+        self.source = source
+        self.destination = destination
+        self.entries: Dict[str, List[int]] = {}
+        self._dirty = False
+
+    @classmethod
+    def for_transfer(cls, source: Path, destination: Path,
+                     manifest_dir: Optional[str] = None) -> "SyncManifest":
+        """Get the manifest for a source/destination pair"""
+        directory = Path(manifest_dir or DEFAULT_MANIFEST_DIR)
+        return cls(directory / f"{transfer_key(source, destination)}.json",
+                   str(Path(source).resolve()), str(Path(destination).resolve()))
+
+    def load(self) -> bool:
+        """
+        Load manifest from disk
+
+        Returns:
+            True if an existing manifest was loaded
+        """
+        self.entries = {}
+        self._dirty = False
+
+        if not self.manifest_file.exists():
+            return False
+
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != self.VERSION:
+            return False
+
+        self.entries = data.get("entries", {})
+        return True
+
+    def save(self) -> bool:
+        """Write manifest to disk if it changed (atomic replace)"""
+        if not self._dirty:
+            return True
+
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.manifest_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": self.VERSION,
+                    "source": self.source,
+                    "destination": self.destination,
+                    "entries": self.entries
+                }, f, separators=(",", ":"), ensure_ascii=False)
+            os.replace(tmp_file, self.manifest_file)
+            self._dirty = False
+            return True
+        except OSError:
+            return False
+
+    def get(self, rel_path: str) -> Optional[Tuple[FileSignature, FileSignature]]:
+        """Get recorded (source, destination) signatures for a path"""
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            return None
+        return tuple(entry[:3]), tuple(entry[3:6])
+
+    def update(self, rel_path: str, src_sig: FileSignature, dst_sig: FileSignature):
+        """Record the signatures of a freshly synced file"""
+        entry = [*src_sig, *dst_sig]
+        if self.entries.get(rel_path) != entry:
+            self.entries[rel_path] = entry
+            self._dirty = True
+
+    def remove(self, rel_path: str):
+        """Forget a path"""
+        if self.entries.pop(rel_path, None) is not None:
+            self._dirty = True
+
+    def retain(self, rel_paths: Iterable[str]):
+        """Drop every entry whose path is not in rel_paths"""
+        keep = set(rel_paths)
+        stale = [rel for rel in self.entries if rel not in keep]
+        for rel in stale:
+            del self.entries[rel]
+        if stale:
+            self._dirty = True
+
+    def is_unchanged(self, rel_path: str, src_sig: FileSignature, rules=None) -> bool:
+        """
+        Check if the source still matches what was last synced
+        
+        Args:
+            rel_path: Relative path key
+            src_sig: Current source signature
+            rules: TimestampRules of the source filesystem (exact if None)
+        """
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            return False
+        if rules is None:
+            return tuple(entry[:3]) == src_sig
+        return rules.signature_matches(tuple(entry[:3]), src_sig)
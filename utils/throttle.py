@@ -0,0 +1,128 @@
+"""
+Transfer Throttling
+Token bucket bandwidth limiting and low I/O / CPU priority for worker threads
+"""
+
+import ctypes
+import os
+import platform
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+# ioprio_set syscall numbers by architecture
+_IOPRIO_SET_SYSCALLS = {
+    "x86_64": 251,
+    "i386": 289,
+    "i686": 289,
+    "aarch64": 30,
+    "armv7l": 314,
+    "armv6l": 314,
+}
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+
+# Windows SetThreadPriority mode: low CPU, I/O and memory priority
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
+LOW_PRIORITY_NICE = 10
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting throughput in bytes per second
+
+    All workers of a task share one bucket, so the limit applies to the
+    task as a whole. Callers consume tokens after moving data; when the
+    bucket runs dry, consume() sleeps until the debt is paid off.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Initialize token bucket
+
+        Args:
+            rate: Allowed bytes per second
+            burst: Bucket capacity in bytes (default: one second of rate)
+        """
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, count: int, should_stop: Optional[Callable[[], bool]] = None):
+        """
+        Take count bytes from the bucket, sleeping while it is in debt
+
+        Args:
+            count: Bytes moved
+            should_stop: Returns True to abandon the wait early
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= count
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        # Sleep in short slices so stop requests are honoured
+        deadline = time.monotonic() + wait
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (should_stop and should_stop()):
+                break
+            time.sleep(min(remaining, 0.1))
+
+
+def _set_linux_io_idle() -> bool:
+    """Put the calling thread in the idle I/O scheduling class"""
+    syscall_nr = _IOPRIO_SET_SYSCALLS.get(platform.machine())
+    if syscall_nr is None:
+        return False
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        ioprio = _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT
+        return libc.syscall(syscall_nr, _IOPRIO_WHO_PROCESS, threading.get_native_id(), ioprio) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def lower_thread_priority() -> List[str]:
+    """
+    Lower the CPU and I/O priority of the calling thread
+
+    On Linux the thread gets the idle I/O class (ioprio_set) and a higher
+    nice value; both are per thread and inherited by threads it starts.
+    On Windows the thread enters background processing mode, which lowers
+    CPU, I/O and memory priority. The GUI thread is never affected.
+
+    Returns:
+        Descriptions of the adjustments that were applied
+    """
+    applied = []
+
+    if sys.platform.startswith("linux"):
+        if _set_linux_io_idle():
+            applied.append("idle I/O class")
+        try:
+            tid = threading.get_native_id()
+            current = os.getpriority(os.PRIO_PROCESS, tid)
+            if current < LOW_PRIORITY_NICE:
+                os.setpriority(os.PRIO_PROCESS, tid, LOW_PRIORITY_NICE)
+            applied.append(f"nice {max(current, LOW_PRIORITY_NICE)}")
+        except (OSError, AttributeError):
+            pass
+
+    elif sys.platform == "win32":
+        try:
+            kernel32 = ctypes.windll.kernel32
+            if kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN):
+                applied.append("background mode")
+        except (OSError, AttributeError):
+            pass
+
+    return applied
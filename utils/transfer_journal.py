@@ -0,0 +1,132 @@
+"""
+Transfer Journal
+Append-only checkpoint journal for resuming interrupted transfers
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .sync_manifest import DEFAULT_MANIFEST_DIR, transfer_key
+
+
+# Suffix of partially written large files kept for resuming
+PARTIAL_SUFFIX = ".autosync-part"
+
+# Bytes copied between two offset checkpoints of a large file
+CHECKPOINT_BYTES = 64 * 1024 * 1024
+
+
+class TransferJournal:
+    """
+    Checkpoint journal of one transfer run
+
+    Every completed file is appended as one JSON line, and large files in
+    progress record the byte offset reached. If a run is interrupted (app
+    closed, drive pulled), the next run loads the journal, skips files
+    that were completed with the same source size and mtime and continues
+    partial files from their offset. The journal is discarded once a run
+    gets through all files.
+    """
+
+    def __init__(self, journal_file: Path):
+        """
+        Initialize journal
+
+        Args:
+            journal_file: Path of the append-only journal file
+        """
+        self.journal_file = Path(journal_file)
+        self._done: Dict[str, Tuple[int, int]] = {}
+        self._partial: Dict[str, Tuple[int, int, int]] = {}
+        self._handle = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_transfer(cls, source: Path, destination: Path,
+                     manifest_dir: Optional[str] = None) -> "TransferJournal":
+        """Get the journal for a source/destination pair"""
+        directory = Path(manifest_dir or DEFAULT_MANIFEST_DIR) / "journals"
+        return cls(directory / f"{transfer_key(source, destination)}.journal")
+
+    def load(self) -> int:
+        """
+        Load checkpoints left by an interrupted run
+
+        Returns:
+            Number of files recorded as completed
+        """
+        self._done = {}
+        self._partial = {}
+
+        try:
+            with open(self.journal_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash
+                        continue
+                    rel_path = record.get("f")
+                    if rel_path is None:
+                        continue
+                    if "o" in record:
+                        self._partial[rel_path] = (record["s"], record["m"], record["o"])
+                    else:
+                        self._done[rel_path] = (record["s"], record["m"])
+                        self._partial.pop(rel_path, None)
+        except OSError:
+            pass
+
+        return len(self._done)
+
+    def open(self):
+        """Open the journal for appending"""
+        self.journal_file.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = open(self.journal_file, 'a', encoding='utf-8')
+
+    def close(self):
+        """Close the journal, keeping it for the next run"""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def discard(self):
+        """Close and delete the journal after a complete run"""
+        self.close()
+        self._done = {}
+        self._partial = {}
+        try:
+            os.unlink(self.journal_file)
+        except OSError:
+            pass
+
+    def _append(self, record: dict):
+        """Append one record and hand it to the OS right away"""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._handle is not None:
+                self._handle.write(line)
+                self._handle.flush()
+
+    def is_done(self, rel_path: str, size: int, mtime_ns: int) -> bool:
+        """Check if a file with this source size/mtime was completed"""
+        return self._done.get(rel_path) == (size, mtime_ns)
+
+    def record_done(self, rel_path: str, size: int, mtime_ns: int):
+        """Checkpoint a completed file"""
+        self._append({"f": rel_path, "s": size, "m": mtime_ns})
+
+    def partial_offset(self, rel_path: str, size: int, mtime_ns: int) -> int:
+        """Byte offset a partial copy of this source reached (0 if none)"""
+        partial = self._partial.get(rel_path)
+        if partial is None or partial[:2] != (size, mtime_ns):
+            return 0
+        return partial[2]
+
+    def record_partial(self, rel_path: str, size: int, mtime_ns: int, offset: int):
+        """Checkpoint the offset reached in a large file"""
+        self._append({"f": rel_path, "s": size, "m": mtime_ns, "o": offset})
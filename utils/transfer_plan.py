@@ -0,0 +1,214 @@
+"""
+Transfer Plan
+Dry-run action lists and duration estimates for file transfers
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .file_scanner import ScanEntry
+from .sync_manifest import DEFAULT_MANIFEST_DIR, transfer_key
+from .transfer_stats import format_bytes, format_duration
+
+
+# Plan actions
+ACTION_COPY = "copy"
+ACTION_UPDATE = "update"
+ACTION_SKIP = "skip"
+ACTION_DELETE = "delete"
+
+# Actions of source files, stored as their index in this tuple
+_FILE_ACTIONS = (ACTION_COPY, ACTION_UPDATE, ACTION_SKIP)
+
+
+def free_space(path: Path) -> Optional[int]:
+    """Free bytes on the filesystem holding path (or its nearest existing parent)"""
+    path = Path(path).absolute()
+    for candidate in (path, *path.parents):
+        if candidate.exists():
+            try:
+                return shutil.disk_usage(candidate).free
+            except OSError:
+                return None
+    return None
+
+
+class ThroughputHistory:
+    """
+    Measured throughput of recent runs for one source/destination pair
+
+    Each finished run records its transferred bytes, files and duration;
+    estimates use the totals of the last MAX_RUNS runs, so one unusual run
+    does not dominate.
+    """
+
+    MAX_RUNS = 10
+
+    def __init__(self, history_file: Path):
+        """
+        Initialize history
+
+        Args:
+            history_file: Path of the JSON file backing this history
+        """
+        self.history_file = Path(history_file)
+        self.runs: List[List[float]] = []
+
+    @classmethod
+    def for_transfer(cls, source: Path, destination: Path,
+                     manifest_dir: Optional[str] = None) -> "ThroughputHistory":
+        """Get the history for a source/destination pair"""
+        directory = Path(manifest_dir or DEFAULT_MANIFEST_DIR) / "history"
+        history = cls(directory / f"{transfer_key(source, destination)}.json")
+        history.load()
+        return history
+
+    def load(self):
+        """Load history from disk"""
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                self.runs = json.load(f).get("runs", [])
+        except (OSError, ValueError, AttributeError):
+            self.runs = []
+
+    def record(self, transferred_bytes: int, transferred_files: int, seconds: float) -> bool:
+        """Add a finished run and write the history (atomic replace)"""
+        if transferred_files <= 0 or seconds <= 0:
+            return True
+
+        self.runs = (self.runs + [[transferred_bytes, transferred_files, round(seconds, 3)]])[-self.MAX_RUNS:]
+        try:
+            self.history_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.history_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"runs": self.runs}, f)
+            os.replace(tmp_file, self.history_file)
+            return True
+        except OSError:
+            return False
+
+    def estimate(self, transfer_bytes: int, transfer_files: int) -> Optional[float]:
+        """
+        Estimated seconds to transfer the given amount
+
+        Returns:
+            Estimate based on recorded throughput, or None without history
+        """
+        total_bytes = sum(run[0] for run in self.runs)
+        total_files = sum(run[1] for run in self.runs)
+        total_seconds = sum(run[2] for run in self.runs)
+        if total_seconds <= 0:
+            return None
+        if transfer_bytes and total_bytes:
+            return transfer_bytes / (total_bytes / total_seconds)
+        if total_files:
+            return transfer_files / (total_files / total_seconds)
+        return None
+
+
+class TransferPlan:
+    """
+    What a transfer run would do, computed without writing anything
+
+    Holds one action per source file (copy, update or skip) and the
+    destination files mirror mode would delete, together with the byte
+    totals, the free space on the destination and a duration estimate.
+    A plan can be handed back to the task to execute it without scanning
+    again.
+
+    The scanned files are kept as the scan returned them (a FileList for
+    compact manifests) with one byte per action, so a plan over millions
+    of files holds no entry object per file.
+    """
+
+    def __init__(self, source: Path, destination: Path, operation: str,
+                 files: Optional[Sequence[ScanEntry]] = None):
+        """
+        Initialize plan
+
+        Args:
+            source: Source root (or file)
+            destination: Destination root (or file)
+            operation: 'copy' or 'move'
+            files: Scanned source files (a list or FileList), in the order
+                their actions are added
+        """
+        self.source = Path(source)
+        self.destination = Path(destination)
+        self.operation = operation
+        self.files = files if files is not None else []
+        self._actions = bytearray()
+        self.deletes: List[str] = []
+        self.transfer_bytes = 0
+        self.transfer_files = 0
+        self.required_bytes = 0
+        self.free_bytes: Optional[int] = None
+        self.estimated_seconds: Optional[float] = None
+        self.created_at = time.time()
+
+    def add(self, action: str, entry: ScanEntry, existing_size: int = 0):
+        """
+        Add the action for the next source file of `files`
+
+        Args:
+            action: ACTION_COPY, ACTION_UPDATE or ACTION_SKIP
+            entry: That scanned source file
+            existing_size: Size of the destination file an update replaces
+        """
+        self._actions.append(_FILE_ACTIONS.index(action))
+        if action in (ACTION_COPY, ACTION_UPDATE):
+            self.transfer_bytes += entry.size
+            self.transfer_files += 1
+            self.required_bytes += max(0, entry.size - existing_size)
+
+    @property
+    def actions(self) -> Iterator[Tuple[str, ScanEntry]]:
+        """(action, scanned file) pairs in scan order"""
+        for code, entry in zip(self._actions, self.files):
+            yield _FILE_ACTIONS[code], entry
+
+    @property
+    def transfers(self) -> List[ScanEntry]:
+        """Source files the plan copies or updates"""
+        return [entry for action, entry in self.actions if action in (ACTION_COPY, ACTION_UPDATE)]
+
+    @property
+    def fits(self) -> bool:
+        """Whether the destination has room for the planned data (True if unknown)"""
+        return self.free_bytes is None or self.required_bytes <= self.free_bytes
+
+    def counts(self) -> Dict[str, int]:
+        """Number of files per action"""
+        counts = {action: self._actions.count(code) for code, action in enumerate(_FILE_ACTIONS)}
+        counts[ACTION_DELETE] = len(self.deletes)
+        return counts
+
+    def summary(self) -> str:
+        """One-line description of the plan"""
+        counts = self.counts()
+        text = (f"{counts[ACTION_COPY]} to copy, {counts[ACTION_UPDATE]} to update, "
+                f"{counts[ACTION_SKIP]} to skip, {counts[ACTION_DELETE]} to delete; "
+                f"{format_bytes(self.transfer_bytes)} to transfer")
+        if self.estimated_seconds is not None:
+            text += f", about {format_duration(self.estimated_seconds)}"
+        return text
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize plan to dictionary"""
+        return {
+            "source": str(self.source),
+            "destination": str(self.destination),
+            "operation": self.operation,
+            "counts": self.counts(),
+            "transfer_bytes": self.transfer_bytes,
+            "required_bytes": self.required_bytes,
+            "free_bytes": self.free_bytes,
+            "fits": self.fits,
+            "estimated_seconds": round(self.estimated_seconds, 1) if self.estimated_seconds is not None else None,
+            "actions": [[action, entry.rel_path, entry.size] for action, entry in self.actions],
+            "deletes": list(self.deletes)
+        }
@@ -0,0 +1,163 @@
+"""
+Transfer Statistics
+Byte-weighted progress, rolling throughput and ETA for file transfers
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+def format_bytes(size: float) -> str:
+    """Format a byte count for display"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration for display"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes}m"
+
+
+class TransferStats:
+    """
+    Thread-safe progress accounting for one transfer run
+
+    Progress is weighted by bytes: files that are skipped count as done
+    but not as transferred, so they move the progress bar without
+    inflating the throughput. Throughput and ETA use a rolling window so
+    they follow the current speed rather than the run average.
+    """
+
+    def __init__(self, window: float = 5.0):
+        """
+        Initialize stats
+
+        Args:
+            window: Rolling window for throughput in seconds
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, total_bytes: int = 0, total_files: int = 0):
+        """Start a new run"""
+        with self._lock:
+            self.total_bytes = total_bytes
+            self.total_files = total_files
+            self.done_bytes = 0
+            self.done_files = 0
+            self.transferred_bytes = 0
+            self.transferred_files = 0
+            self.started_at = time.monotonic()
+            self.finished_at: Optional[float] = None
+            self._samples = deque([(self.started_at, 0, 0)])
+
+    def add_bytes(self, count: int, transferred: bool = True):
+        """Account bytes of a file in progress (or of a skipped file)"""
+        if count <= 0:
+            return
+        with self._lock:
+            self.done_bytes += count
+            if transferred:
+                self.transferred_bytes += count
+                self._sample()
+
+    def file_done(self, transferred: bool = True):
+        """Account a finished file"""
+        with self._lock:
+            self.done_files += 1
+            if transferred:
+                self.transferred_files += 1
+                self._sample()
+
+    def finish(self):
+        """Mark the run as finished"""
+        with self._lock:
+            self.finished_at = time.monotonic()
+
+    def _sample(self):
+        """Record a throughput sample (lock held)"""
+        now = time.monotonic()
+        self._samples.append((now, self.transferred_bytes, self.transferred_files))
+        while len(self._samples) > 2 and now - self._samples[1][0] > self.window:
+            self._samples.popleft()
+
+    @property
+    def fraction(self) -> float:
+        """Completed fraction (0-1), by bytes when sizes are known"""
+        if self.total_bytes > 0:
+            return min(1.0, self.done_bytes / self.total_bytes)
+        if self.total_files > 0:
+            return min(1.0, self.done_files / self.total_files)
+        return 0.0
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started"""
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return max(0.0, end - self.started_at)
+
+    def rates(self) -> tuple:
+        """Rolling (bytes/s, files/s)"""
+        with self._lock:
+            if self.finished_at is not None:
+                elapsed = self.elapsed
+                if elapsed <= 0:
+                    return 0.0, 0.0
+                return self.transferred_bytes / elapsed, self.transferred_files / elapsed
+
+            now = time.monotonic()
+            start_time, start_bytes, start_files = self._samples[0]
+            span = now - start_time
+            if span <= 0:
+                return 0.0, 0.0
+            return ((self.transferred_bytes - start_bytes) / span,
+                    (self.transferred_files - start_files) / span)
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds remaining, or None if unknown"""
+        if self.finished_at is not None:
+            return 0.0
+        bytes_per_sec, _ = self.rates()
+        remaining = self.total_bytes - self.done_bytes
+        if bytes_per_sec <= 0 or remaining < 0:
+            return None
+        return remaining / bytes_per_sec
+
+    def summary(self) -> str:
+        """One-line throughput summary of the run"""
+        elapsed = self.elapsed
+        bytes_per_sec = self.transferred_bytes / elapsed if elapsed > 0 else 0.0
+        files_per_sec = self.transferred_files / elapsed if elapsed > 0 else 0.0
+        return (f"{format_bytes(self.transferred_bytes)} in {format_duration(elapsed)}, "
+                f"{bytes_per_sec / (1024 * 1024):.1f} MB/s, {files_per_sec:.1f} files/s")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize stats to dictionary"""
+        bytes_per_sec, files_per_sec = self.rates()
+        eta = self.eta
+        return {
+            "total_bytes": self.total_bytes,
+            "done_bytes": self.done_bytes,
+            "transferred_bytes": self.transferred_bytes,
+            "total_files": self.total_files,
+            "done_files": self.done_files,
+            "transferred_files": self.transferred_files,
+            "mb_per_sec": round(bytes_per_sec / (1024 * 1024), 2),
+            "files_per_sec": round(files_per_sec, 1),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(self.elapsed, 1)
+        }
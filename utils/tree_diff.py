@@ -0,0 +1,215 @@
+"""
+Tree Diff
+Classify scanned files against recorded signatures, vectorized with NumPy when installed
+"""
+
+from operator import attrgetter
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .compact_manifest import CompactManifest, FileList, _key_hash
+from .file_scanner import ScanEntry
+from .fs_timestamps import EXACT_RULES, HOUR_NS, TimestampRules
+from .sync_manifest import FileSignature, SyncManifest
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+
+if NUMPY_AVAILABLE:
+    # One row per file: path hash, signature, position in its listing
+    _RECORD = np.dtype([
+        ("key", "<u8"),
+        ("size", "<i8"),
+        ("mtime", "<i8"),
+        ("ino", "<u8"),
+        ("pos", "<i8"),
+    ])
+
+
+class TreeDiff:
+    """
+    Result of comparing a source listing with a target listing
+
+    new, changed and unchanged hold positions in the source listing (in
+    listing order); deleted holds the relative paths only the target has.
+    """
+
+    def __init__(self, new: List[int], changed: List[int], unchanged: List[int],
+                 deleted: List[str]):
+        self.new = new
+        self.changed = changed
+        self.unchanged = unchanged
+        self.deleted = deleted
+
+    def counts(self) -> Tuple[int, int, int, int]:
+        """(new, changed, unchanged, deleted) counts"""
+        return len(self.new), len(self.changed), len(self.unchanged), len(self.deleted)
+
+
+def diff_listings(source: Iterable[Tuple[str, FileSignature]],
+                  target: Iterable[Tuple[str, FileSignature]],
+                  rules: TimestampRules = EXACT_RULES) -> TreeDiff:
+    """
+    Classify the files of two listings as new, changed, unchanged or deleted
+
+    Args:
+        source: (relative path, signature) of the files that should exist
+        target: (relative path, signature) of what was recorded or found
+        rules: How signatures are compared (TimestampRules.signature_matches)
+
+    Returns:
+        TreeDiff with source positions and deleted target paths
+    """
+    remaining = dict(target)
+    new, changed, unchanged = [], [], []
+    for pos, (rel_path, sig) in enumerate(source):
+        recorded = remaining.pop(rel_path, None)
+        if recorded is None:
+            new.append(pos)
+        elif rules.signature_matches(tuple(recorded), tuple(sig)):
+            unchanged.append(pos)
+        else:
+            changed.append(pos)
+    return TreeDiff(new, changed, unchanged, list(remaining))
+
+
+def _scan_records(entries: Sequence[ScanEntry]):
+    """Records of scanned files (a FileList or a list of ScanEntry), in scan order"""
+    count = len(entries)
+    records = np.empty(count, dtype=_RECORD)
+    if isinstance(entries, FileList):
+        # The numeric columns are used as they are
+        paths, sizes, mtimes, inos = entries.columns()
+        records["size"] = np.frombuffer(sizes, np.int64, count)
+        records["mtime"] = np.frombuffer(mtimes, np.int64, count)
+        records["ino"] = np.frombuffer(inos, np.uint64, count)
+    else:
+        paths = list(map(attrgetter("rel_path"), entries))
+        records["size"] = np.fromiter(map(attrgetter("size"), entries), np.int64, count)
+        records["mtime"] = np.fromiter(map(attrgetter("mtime_ns"), entries), np.int64, count)
+        records["ino"] = np.fromiter(map(attrgetter("ino"), entries), np.uint64, count)
+    records["key"] = np.fromiter(map(_key_hash, paths), np.uint64, count)
+    records["pos"] = np.arange(count)
+    return records
+
+
+def _manifest_records(manifest: CompactManifest):
+    """
+    Records of the source signatures in a compact manifest
+
+    Mapped rows are read straight from the file's columns; entries
+    changed since loading replace their rows. Positions below the
+    mapped row count are rows, the rest index entries.changed.
+    """
+    hashes, stats, inos, hidden = manifest.recorded_columns()
+    changed = list(manifest.entries.changed.items())
+    rows = len(hashes)
+    records = np.empty(rows + len(changed), dtype=_RECORD)
+    stat_columns = np.frombuffer(stats, np.int64).reshape(rows, 4)
+    records["key"][:rows] = np.frombuffer(hashes, np.uint64)
+    records["size"][:rows] = stat_columns[:, 0]
+    records["mtime"][:rows] = stat_columns[:, 1]
+    records["ino"][:rows] = np.frombuffer(inos, np.uint64)[0::2]
+    # Release the mapped buffers so the manifest can be closed
+    del stat_columns
+    for i, (rel_path, entry) in enumerate(changed, rows):
+        records[i] = (_key_hash(rel_path), entry[0], entry[1], entry[2], 0)
+    records["pos"] = np.arange(len(records))
+    if hidden:
+        visible = np.ones(len(records), dtype=bool)
+        visible[hidden] = False
+        records = records[visible]
+    return records
+
+
+def _merge(src, dst, rules: TimestampRules):
+    """
+    Join two record arrays on their path hash with a sorted merge
+
+    Both are sorted by key, so one searchsorted call walks the target
+    once; signatures of the joined rows are compared column-wise.
+
+    Returns:
+        (new, changed, unchanged, deleted) position arrays (source
+        positions for the first three, target positions for deleted),
+        or None if a listing has duplicate keys
+    """
+    src = src[np.argsort(src["key"], kind="stable")]
+    dst = dst[np.argsort(dst["key"], kind="stable")]
+    src_keys = np.ascontiguousarray(src["key"])
+    dst_keys = np.ascontiguousarray(dst["key"])
+    if (src_keys[1:] == src_keys[:-1]).any() or (dst_keys[1:] == dst_keys[:-1]).any():
+        return None
+
+    if len(dst):
+        at = np.minimum(np.searchsorted(dst_keys, src_keys), len(dst) - 1)
+        joined = dst_keys[at] == src_keys
+    else:
+        at = np.zeros(len(src), dtype=np.intp)
+        joined = np.zeros(len(src), dtype=bool)
+    src_rows = src[joined]
+    dst_rows = dst[at[joined]]
+
+    same = src_rows["size"] == dst_rows["size"]
+    delta = np.abs(src_rows["mtime"] - dst_rows["mtime"])
+    mtime_same = delta <= rules.tolerance_ns
+    if rules.hour_shift:
+        mtime_same |= np.abs(delta - HOUR_NS) <= rules.tolerance_ns
+    same &= mtime_same
+    if not rules.ignore_inode:
+        same &= src_rows["ino"] == dst_rows["ino"]
+
+    target_joined = np.zeros(len(dst), dtype=bool)
+    target_joined[at[joined]] = True
+    return (np.sort(src["pos"][~joined]), np.sort(src_rows["pos"][~same]),
+            np.sort(src_rows["pos"][same]), np.sort(dst["pos"][~target_joined]))
+
+
+def _diff_compact(entries: Sequence[ScanEntry], manifest: CompactManifest,
+                  rules: TimestampRules) -> Optional[TreeDiff]:
+    """Vectorized diff_manifest() for a mapped compact manifest (None to fall back)"""
+    merged = _merge(_scan_records(entries), _manifest_records(manifest), rules)
+    if merged is None:
+        return None
+    new, changed, unchanged, deleted = merged
+    table = manifest.entries.table
+    changed_paths = list(manifest.entries.changed)
+    deleted_paths = [table.rel_path(pos) if pos < table.count else changed_paths[pos - table.count]
+                     for pos in deleted.tolist()]
+    return TreeDiff(new.tolist(), changed.tolist(), unchanged.tolist(), deleted_paths)
+
+
+def diff_manifest(entries: Sequence[ScanEntry], manifest: SyncManifest,
+                  rules: TimestampRules = EXACT_RULES) -> TreeDiff:
+    """
+    Classify scanned source files against the source signatures in a manifest
+
+    Unchanged files are the ones SyncManifest.is_unchanged() accepts.
+    For a mapped CompactManifest with NumPy installed, the scan and the
+    manifest's columns become structured arrays joined with a sorted
+    merge on the 64-bit path hash the manifest is sorted by, instead of
+    a binary search and a path comparison per file. Paths are not
+    compared after the join: a hash collision would also need equal
+    size, mtime and inode to be taken for unchanged, and otherwise only
+    costs a copy. JSON manifests are dicts already and are compared with
+    diff_listings().
+
+    Args:
+        entries: Scanned source files (a list of ScanEntry or a FileList)
+        manifest: Loaded sync manifest
+        rules: TimestampRules of the source filesystem
+
+    Returns:
+        TreeDiff with scan positions and the manifest paths no longer scanned
+    """
+    if NUMPY_AVAILABLE and isinstance(manifest, CompactManifest) \
+            and manifest.entries.table is not None:
+        result = _diff_compact(entries, manifest, rules)
+        if result is not None:
+            return result
+    recorded = ((rel_path, entry[:3]) for rel_path, entry in manifest.entries.items())
+    return diff_listings(((entry.rel_path, entry.signature) for entry in entries), recorded, rules)
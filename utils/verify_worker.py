@@ -0,0 +1,71 @@
+"""
+Verify Worker
+Hash functions run in the verification worker processes
+"""
+
+import hashlib
+import os
+from typing import Tuple
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
+
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+    blake3 = None
+
+
+# Bytes read per hash update
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _new_hasher(algorithm: str):
+    """Create a hash object for a resolved algorithm"""
+    if algorithm == "xxh3_128":
+        return xxhash.xxh3_128()
+    if algorithm == "blake3":
+        return blake3.blake3()
+    return hashlib.new(algorithm)
+
+
+def drop_cached(path: str):
+    """
+    Flush a file and evict it from the page cache (where supported)
+
+    A copy that was just written is still in the page cache, so hashing
+    it would read back what was written rather than what reached the
+    device. After this, reading it goes to the device.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+
+def hash_file(path: str, algorithm: str) -> str:
+    """Hex digest of a file's contents"""
+    hasher = _new_hasher(algorithm)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_pair(src: str, dst: str, algorithm: str) -> Tuple[str, str]:
+    """Hex digests of a source file and its copy, the copy read back from its device"""
+    drop_cached(dst)
+    return hash_file(src, algorithm), hash_file(dst, algorithm)